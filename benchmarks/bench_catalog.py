@@ -0,0 +1,96 @@
+# bench_catalog.py
+# External catalog reloads (catalog/external.py) on synthetic catalogs: full
+# load + index time and memory, then a small edit to the file (updates, adds and
+# deletes) applied as an incremental diff versus a full rebuild of the store.
+#
+#   python -m benchmarks.bench_catalog --sizes 100000,1000000 --formats jsonl,sqlite
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.external import CatalogSync, write_catalog
+from catalog.listing_store import ListingStore
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, round(time.perf_counter() - started, 3)
+
+
+def _rss_mb() -> float | None:
+    """Current resident set size (Linux /proc only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def _edit(listings: list[dict], fraction: float, seed: int = 1) -> dict:
+    """Reprice `fraction` of the listings, delete as many and add as many new ones."""
+    rng = random.Random(seed)
+    count = max(1, int(len(listings) * fraction))
+    for listing in rng.sample(listings, count):
+        listing["price"] += 1_000 if listing["type"] == "sale" else 25
+    deleted = set(rng.sample(range(len(listings)), count))
+    listings[:] = [listing for i, listing in enumerate(listings) if i not in deleted]
+    for extra in synthetic_listings(count, seed=seed + 1):
+        extra["id"] = f"new-{extra['name']}"
+        listings.append(extra)
+    return {"updated": count, "deleted": count, "added": count}
+
+
+def run(size: int, fmt: str, fraction: float) -> dict:
+    directory = tempfile.mkdtemp(prefix="bench_catalog_")
+    path = os.path.join(directory, f"listings.{'db' if fmt == 'sqlite' else fmt}")
+    try:
+        listings = synthetic_listings(size)
+        for i, listing in enumerate(listings):
+            listing["id"] = f"L{i}"
+        _, write_s = _timed(lambda: write_catalog(path, listings))
+        row = {"format": fmt, "listings": size, "file_mb": round(os.path.getsize(path) / 2**20, 1), "write_s": write_s}
+
+        gc.collect()
+        before = _rss_mb()
+        sync = CatalogSync(path)
+        loaded, row["load_s"] = _timed(sync.load)
+        store, row["index_s"] = _timed(lambda: ListingStore(loaded))
+        del loaded
+        gc.collect()
+        # Store plus the sync's per-record digests; the source list dicts are not counted
+        row["store_rss_mb"] = round(_rss_mb() - before, 1) if before is not None else None
+
+        row["edit"] = _edit(listings, fraction)
+        write_catalog(path, listings)
+        del listings
+        diff, row["diff_s"] = _timed(sync.diff)
+        changes, row["apply_s"] = _timed(lambda: store.apply(diff.upserts, diff.deleted))
+        row["invalidated_cache_tags"] = len(changes.cache_tags)
+        row["incremental_s"] = round(row["diff_s"] + row["apply_s"], 3)
+        row["full_rebuild_s"] = _timed(lambda: ListingStore(CatalogSync(path).load()))[1]
+        _, row["compact_s"] = _timed(store.compacted)
+        return row
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Catalog load, incremental reload and full rebuild times")
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--formats", default="jsonl,sqlite")
+    parser.add_argument("--edit-fraction", type=float, default=0.001, help="share of listings updated, deleted and added")
+    args = parser.parse_args()
+    report = [run(int(size), fmt, args.edit_fraction) for size in args.sizes.split(",") for fmt in args.formats.split(",")]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,154 @@
+# bench_chat.py
+# Load test for the /chat pipeline with a deterministic fake model in place of
+# Gemini: drives the FastAPI app at a given concurrency and reports latency
+# percentiles, throughput and upstream calls per request and per agent, as JSON.
+#
+#   python -m benchmarks.bench_chat --requests 500 --concurrency 32 --latency 0.05 --out run.json
+#   python -m benchmarks.bench_chat ... --baseline run.json   # adds deltas against an earlier run
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import httpx
+
+import main
+from harness.fake_model import install_fake_models
+from routing.router import RouterStats
+from serving.cache import InMemoryBackend, ResponseCache
+
+# Mix of routable questions (fast path) and ambiguous ones (orchestrator)
+DEFAULT_MESSAGES = [
+    "What is your phone number?",
+    "Any condos for rent under 3500?",
+    "Show me villas for sale",
+    "What is this website about?",
+    "I'm looking for a place in Harbor View",
+    "Can you help me find something with a fireplace?",
+    "3-bed townhouse under $1.3M",
+    "How do I schedule a viewing?",
+    "Show me condos for sale and for rent in Harbor View and give me your phone number",
+]
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "upstream_calls_per_request")
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args) -> dict:
+    models = install_fake_models(main, latency=args.latency, token_latency=args.token_latency,
+                                 reply=("word " * args.output_tokens).strip() if args.output_tokens else None)
+    if not args.cache:
+        main.response_cache = ResponseCache(InMemoryBackend(max_entries=0))
+    main.chat_flight.enabled = main.tool_flight.enabled = args.coalesce
+    main.fanout.enabled = args.fanout
+    messages = args.messages or DEFAULT_MESSAGES
+    endpoint = "/chat/stream?format=ndjson" if args.stream else "/chat"
+
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(endpoint, json={"message": messages[i % len(messages)]})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200 or (not args.stream and "error" in response.json()):
+                    errors += 1
+
+        # Warm-up outside the measurement (imports, first-call setup)
+        await one(0)
+        latencies.clear()
+        for model in models.values():
+            model.calls = 0
+        main.intent_router.stats = RouterStats()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total_calls = sum(model.calls for model in models.values())
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_s": args.latency,
+            "token_latency_s": args.token_latency,
+            "output_tokens": args.output_tokens,
+            "stream": args.stream,
+            "cache": args.cache,
+            "coalesce": args.coalesce,
+            "fanout": args.fanout,
+            "python": platform.python_version(),
+        },
+        "results": {
+            "errors": errors,
+            "wall_seconds": round(elapsed, 4),
+            "throughput_rps": round(args.requests / elapsed, 2),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "upstream_calls": total_calls,
+            "upstream_calls_per_request": round(total_calls / args.requests, 3),
+            "upstream_calls_by_agent": {name: model.calls for name, model in models.items()},
+            "router": main.intent_router.stats.snapshot(),
+        },
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    deltas = {}
+    for metric in COMPARED_METRICS:
+        new, old = report["results"][metric], baseline["results"].get(metric)
+        if old:
+            deltas[metric] = {"baseline": old, "current": new, "change_pct": round((new - old) / old * 100, 2)}
+    return deltas
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load test /chat with a fake model")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake model call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument("--output-tokens", type=int, default=0, help="reply length in tokens (0 = echo tool output)")
+    parser.add_argument("--stream", action="store_true", help="hit /chat/stream instead of /chat")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--coalesce", action="store_true", help="keep single-flight coalescing on")
+    parser.add_argument("--no-fanout", dest="fanout", action="store_false", help="send multi-intent messages to the orchestrator")
+    parser.add_argument("--messages", nargs="*", help="messages to cycle through")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
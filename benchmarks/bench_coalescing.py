@@ -0,0 +1,60 @@
+# bench_coalescing.py
+# Burst load test for single-flight coalescing: fires N near-identical /chat
+# requests at once against the fake model and counts upstream model calls with
+# coalescing off, on for sub-agent tools only, and fully on.
+#
+#   python -m benchmarks.bench_coalescing --burst 50 --latency 0.1
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import httpx
+
+import main
+from harness.fake_model import FakeModel, install_fake_model
+
+# Same question as it arrives from different visitors; none is routable, so each goes through the orchestrator
+VARIANTS = ["Show me something nice", "show me something nice!", "Show me something nice?", "  show me SOMETHING nice "]
+
+
+async def burst(size: int, chat: bool, tools: bool, latency: float) -> dict:
+    model = install_fake_model(main, FakeModel(latency=latency))
+    for flight, enabled in ((main.chat_flight, chat), (main.tool_flight, tools)):
+        flight.enabled = enabled
+        flight.leaders = flight.followers = 0
+    main.response_cache.invalidate()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post("/chat", json={"message": VARIANTS[i % len(VARIANTS)]}) for i in range(size))
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "burst": size,
+        "chat_coalescing": chat,
+        "tool_coalescing": tools,
+        "ok": sum(r.status_code == 200 and "response" in r.json() for r in responses),
+        "upstream_calls": model.calls,
+        "upstream_calls_per_request": model.calls / size,
+        "wall_seconds": round(elapsed, 3),
+        "stats": {"chat": main.chat_flight.snapshot(), "tools": main.tool_flight.snapshot()},
+    }
+
+
+async def run(size: int, latency: float):
+    for chat, tools in ((False, False), (False, True), (True, True)):
+        print(json.dumps(await burst(size, chat, tools, latency)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args.burst, args.latency))
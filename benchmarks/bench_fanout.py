@@ -0,0 +1,71 @@
+# bench_fanout.py
+# Multi-intent latency: runs the branches of a multi-intent message one after
+# another (as the orchestrator's tool loop does) and then concurrently through
+# FanOut, with fake models, and reports wall-clock time for each. A final run
+# makes one branch slower than its timeout to show the degraded answer.
+#
+#   python -m benchmarks.bench_fanout --latency 0.2 --timeout 1.0
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import main
+from harness.fake_model import install_fake_models
+
+MESSAGE = "Show me condos for sale and for rent in Harbor View and give me your phone number"
+
+
+async def run(args) -> dict:
+    models = install_fake_models(main, latency=args.latency)
+    fanout = main.fanout
+    fanout.flight = None  # every branch pays its own model calls
+    fanout.branch_timeout = args.timeout
+    branches = fanout.plan(main.intent_router.route(args.message))
+
+    started = time.perf_counter()
+    for agent in branches:
+        await fanout._branch(agent, args.message, main.run_config)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await fanout.run_branches(branches, args.message, main.run_config)
+    parallel = time.perf_counter() - started
+
+    # One branch slower than the timeout: the rest still answer
+    models[branches[0]].latency = args.timeout * 2
+    started = time.perf_counter()
+    results = await fanout.run_branches(branches, args.message, main.run_config)
+    degraded = time.perf_counter() - started
+
+    return {
+        "message": args.message,
+        "branches": branches,
+        "model_latency_s": args.latency,
+        "sequential_ms": round(sequential * 1000, 1),
+        "parallel_ms": round(parallel * 1000, 1),
+        "speedup": round(sequential / parallel, 2),
+        "degraded": {
+            "slow_branch": branches[0],
+            "wall_ms": round(degraded * 1000, 1),
+            "timed_out": [result.agent for result in results if result.timed_out],
+            "answered": [result.agent for result in results if result.output is not None],
+        },
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Sequential vs parallel multi-intent dispatch")
+    parser.add_argument("--message", default=MESSAGE)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake model call")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-branch timeout in seconds")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
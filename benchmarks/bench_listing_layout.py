@@ -0,0 +1,86 @@
+# bench_listing_layout.py
+# Memory and throughput of the old per-call dict literals versus ListingColumns
+# with cached renderings.
+#
+#   python -m benchmarks.bench_listing_layout --sizes 10000,1000000
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.columnar import ListingColumns
+
+TOP_N = 10
+
+
+def _traced(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def _rate(fn, min_seconds: float = 1.0) -> float:
+    """Calls per second, running at least once and for roughly `min_seconds`."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def dict_literals(listings: list[dict]) -> list[dict]:
+    """What the old tools did on every call: build fresh dicts and feature lists."""
+    return [{**listing, "features": list(listing["features"])} for listing in listings]
+
+
+def bench(size: int) -> dict:
+    source = synthetic_listings(size)
+    # Strings in `source` are shared by both layouts, so each measurement counts only its own structure
+    dicts, dict_bytes = _traced(lambda: dict_literals(source))
+    columns, column_bytes = _traced(lambda: ListingColumns(source))
+
+    def fill_render_cache():
+        for listing_id in range(size):
+            columns.rendered(listing_id)
+
+    _, render_bytes = _traced(fill_render_cache)
+    top = list(range(TOP_N))
+
+    result = {
+        "listings": size,
+        "memory_bytes": {
+            "dict_literals": dict_bytes,
+            "columns": column_bytes,
+            "columns_rendered_cache": render_bytes,
+        },
+        "full_catalog_calls_per_sec": {
+            "dict_literals": _rate(lambda: str(dict_literals(source))),
+            "columns": _rate(lambda: columns.render(range(size))),
+        },
+        "top_n_calls_per_sec": {
+            "dict_literals": _rate(lambda: str(dict_literals(source[:TOP_N]))),
+            "columns": _rate(lambda: columns.render(top)),
+        },
+    }
+    del dicts
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,1000000")
+    args = parser.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(json.dumps(bench(size)))
+
+
+if __name__ == "__main__":
+    main()
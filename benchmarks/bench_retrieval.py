@@ -0,0 +1,109 @@
+# bench_retrieval.py
+# Hybrid retrieval (retrieval/hybrid.py) on synthetic listing text: build time,
+# save and memory-mapped reload time, incremental add/remove, and query latency
+# (p50/p95) for free-text queries over the whole catalog and over a filtered
+# candidate set, on the freshly built and on the memory-mapped index.
+#
+#   python -m benchmarks.bench_retrieval --sizes 10000,100000,1000000
+
+import argparse
+import json
+import random
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_listings
+from retrieval.hybrid import HybridIndex
+from retrieval.text import listing_text
+
+QUERIES = [
+    "something cozy near the water with a fireplace",
+    "quiet condo with a gym and in-unit laundry",
+    "historic townhouse with exposed brick",
+    "waterfront villa with a private dock and pool",
+    "bright studio loft downtown",
+    "home theater wine fridge",
+]
+
+
+def _latencies_ms(fn, queries: list[str], rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": round(statistics.median(samples), 2),
+        "p95": round(samples[int(len(samples) * 0.95) - 1], 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_size(size: int, rounds: int) -> dict:
+    listings = synthetic_listings(size)
+    items = [(listing_id, listing_text(listing)) for listing_id, listing in enumerate(listings)]
+    # A filtered candidate set as the tools pass it: one listing type and property type
+    candidates = [i for i, listing in enumerate(listings) if listing["type"] == "rent" and listing["typeofproperty"] == "condo"]
+    del listings
+
+    row = {"documents": size, "candidates": len(candidates)}
+    started = time.perf_counter()
+    index = HybridIndex()
+    index.add_many(items)
+    row["build_s"] = round(time.perf_counter() - started, 2)
+    row["build_peak_rss_mb"] = _peak_rss_mb()
+    row["query_ms"] = _latencies_ms(lambda query: index.search(query, k=10), QUERIES, rounds)
+    row["filtered_query_ms"] = _latencies_ms(lambda query: index.search(query, k=10, candidates=candidates), QUERIES, rounds)
+
+    path = tempfile.mkdtemp(prefix="bench_retrieval_")
+    try:
+        started = time.perf_counter()
+        index.save(path)
+        row["save_s"] = round(time.perf_counter() - started, 2)
+        del index
+        started = time.perf_counter()
+        loaded = HybridIndex.load(path)
+        row["load_mmap_s"] = round(time.perf_counter() - started, 3)
+        # First query pages the vectors in; the percentiles are then the warm numbers
+        started = time.perf_counter()
+        loaded.search(QUERIES[0], k=10)
+        row["mmap_first_query_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        row["mmap_query_ms"] = _latencies_ms(lambda query: loaded.search(query, k=10), QUERIES, rounds)
+
+        rng = random.Random(1)
+        updated = rng.sample(range(size), min(1000, size))
+        started = time.perf_counter()
+        for listing_id in updated:
+            loaded.add(listing_id, items[listing_id][1] + " newly renovated with a fireplace")
+        row["update_us"] = round((time.perf_counter() - started) / len(updated) * 1e6, 1)
+        started = time.perf_counter()
+        for listing_id in updated:
+            loaded.remove(listing_id)
+        row["remove_us"] = round((time.perf_counter() - started) / len(updated) * 1e6, 1)
+        row["query_after_updates_ms"] = _latencies_ms(lambda query: loaded.search(query, k=10), QUERIES, rounds)
+        del loaded
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    row["peak_rss_mb"] = _peak_rss_mb()
+    return row
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Hybrid BM25 + vector retrieval: build, reload and query latency")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    report = {size: run_size(int(size), args.rounds) for size in args.sizes.split(",")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,51 @@
+# bench_search.py
+# Latency of the structured search path (/search and the /chat handoff) on
+# synthetic catalogs: filters, free text, sorted pages and facet counts.
+#
+#   python -m benchmarks.bench_search --sizes 14,10000,100000
+
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.listing_store import ListingStore
+from catalog.search import SearchQuery, search_catalog, structured_query
+
+CASES = {
+    "filters": SearchQuery(type="rent", typeofproperty="condo", max_price=3500, facets=False),
+    "free_text": SearchQuery(q="3-bed townhouse under $1.3M", facets=False),
+    "sorted_page": SearchQuery(type="sale", sort="-price", page=3, page_size=20, facets=False),
+    "facets": SearchQuery(q="rentals under $2500 in CA"),
+}
+
+
+def _latency_us(fn, min_seconds: float = 0.5) -> float:
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return round(elapsed / calls * 1e6, 1)
+
+
+def run(sizes: list[int]) -> dict:
+    report = {}
+    for size in sizes:
+        store = ListingStore(synthetic_listings(size))
+        row = {name: _latency_us(lambda query=query: search_catalog(store, query)) for name, query in CASES.items()}
+        row["handoff_check"] = _latency_us(lambda: structured_query(store, "Any condos for rent under 3500?"))
+        report[size] = row
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Structured search latency (microseconds per call)")
+    parser.add_argument("--sizes", default="14,10000,100000")
+    args = parser.parse_args()
+    print(json.dumps(run([int(size) for size in args.sizes.split(",")]), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
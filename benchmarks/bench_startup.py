@@ -0,0 +1,130 @@
+# bench_startup.py
+# Cold-start numbers to track regressions: time to `import main` in a fresh
+# interpreter, and per STARTUP_WARMUP mode the time from process spawn to the
+# port accepting requests, to /ready answering 200 and to the first /chat
+# response (sent as soon as the port accepts). The upstream is the local stub
+# server, so no key or network is needed.
+#
+#   python -m benchmarks.bench_startup --runs 5 --modes background,blocking,off
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+FIRST_MESSAGE = "Can you help me find something with a fireplace?"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _env(**extra) -> dict:
+    env = dict(os.environ, GEMINI_API_KEY="stub-key", LOG_LEVEL="WARNING", **extra)
+    env["PYTHONPATH"] = os.getcwd() + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_seconds(runs: int) -> list[float]:
+    return [
+        float(subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=_env(), capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    ]
+
+
+def _wait(fn, timeout: float = 60.0, interval: float = 0.005):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            result = fn()
+            if result:
+                return result
+        except httpx.TransportError:
+            pass
+        time.sleep(interval)
+    raise TimeoutError("service did not come up")
+
+
+def cold_start(mode: str, upstream_url: str) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=_env(STARTUP_WARMUP=mode, GEMINI_BASE_URL=upstream_url),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=base, timeout=60) as client:
+            # blocking mode only binds the port after the warm-up finished
+            _wait(lambda: client.get("/ready"))
+            listening = time.perf_counter() - started
+            response = client.post("/chat", json={"message": FIRST_MESSAGE})
+            first_chat = time.perf_counter() - started
+            _wait(lambda: client.get("/ready").status_code == 200)
+            ready = time.perf_counter() - started
+            warmup = client.get("/ready").json()
+        return {
+            "listening_s": round(listening, 3),
+            "first_chat_s": round(first_chat, 3),
+            "ready_s": round(ready, 3),
+            "first_chat_ok": "response" in response.json(),
+            "warmup_steps": warmup["steps"],
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _median(rows: list[dict], key: str) -> float:
+    return round(statistics.median(row[key] for row in rows), 3)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Import time and time to first response")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", default="background,blocking,off")
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    upstream_port = _free_port()
+    upstream = subprocess.Popen(
+        [sys.executable, "-m", "harness.stub_openai", "--port", str(upstream_port), "--latency", str(args.upstream_latency)],
+        env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{upstream_port}") as client:
+            _wait(lambda: client.get("/stats"))
+        imports = import_seconds(args.runs)
+        report = {
+            "python": sys.version.split()[0],
+            "import_main_s": {"median": round(statistics.median(imports), 3), "runs": [round(value, 3) for value in imports]},
+            "modes": {},
+        }
+        for mode in args.modes.split(","):
+            rows = [cold_start(mode, f"http://127.0.0.1:{upstream_port}") for _ in range(args.runs)]
+            report["modes"][mode] = {
+                "listening_s": _median(rows, "listening_s"),
+                "first_chat_s": _median(rows, "first_chat_s"),
+                "ready_s": _median(rows, "ready_s"),
+                "first_chat_ok": all(row["first_chat_ok"] for row in rows),
+                "warmup_steps": rows[-1]["warmup_steps"],
+            }
+    finally:
+        upstream.terminate()
+        upstream.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
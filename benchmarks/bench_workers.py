@@ -0,0 +1,186 @@
+# bench_workers.py
+# Throughput of the multi-process serving mode (serving/workers.py) as the worker
+# count grows. For each count the pre-forked server is started on a synthetic
+# catalog and driven with model-free requests (/search and structured /chat
+# messages answered by the search handoff) from several client processes; the
+# report has requests/s, latency percentiles, the speedup over one worker and
+# worker memory (PSS vs RSS, so pages shared between workers show up).
+#
+#   python -m benchmarks.bench_workers --workers 1,2,4,8 --listings 20000 --seconds 10
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.external import write_catalog
+
+SEARCHES = [
+    "/search?q=condos+for+rent+under+3500&facets=false",
+    "/search?type=sale&typeofproperty=villa&sort=-price&page=2",
+    "/search?q=3-bed+townhouse+in+Harbor+View",
+    "/search?q=rentals+under+2500+in+CA",
+]
+MESSAGES = [
+    "3-bed townhouse for sale under $1.3M",
+    "Any condos for rent under 3500?",
+    "villas for sale in Lakeside",
+]
+
+
+async def _drive(base_url: str, concurrency: int, seconds: float) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client: httpx.AsyncClient, offset: int):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if i % 2:
+                    response = await client.get(SEARCHES[i // 2 % len(SEARCHES)])
+                else:
+                    response = await client.post("/chat", json={"message": MESSAGES[i // 2 % len(MESSAGES)]})
+                if response.status_code != 200 or "error" in response.json():
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            i += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client, offset) for offset in range(concurrency)))
+    return latencies, errors
+
+
+def _client_process(args) -> tuple[list[float], int]:
+    return asyncio.run(_drive(*args))
+
+
+def _memory_kb(pid: int) -> dict:
+    """Rss/Pss/private totals from /proc/<pid>/smaps_rollup (Linux only)."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def _wait_ready(base_url: str, timeout: float = 300.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+def run(workers: int, env: dict, port: int, clients: int, concurrency: int, seconds: float, warmup: float) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "serving.workers", "--workers", str(workers), "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base_url)
+        with multiprocessing.get_context("fork").Pool(clients) as pool:
+            pool.map(_client_process, [(base_url, concurrency, warmup)] * clients)
+            started = time.perf_counter()
+            results = pool.map(_client_process, [(base_url, concurrency, seconds)] * clients)
+            elapsed = time.perf_counter() - started
+        latencies = sorted(latency for part, _ in results for latency in part)
+        errors = sum(part_errors for _, part_errors in results)
+        memory = [_memory_kb(child) for child in _children(server.pid)]
+        return {
+            "workers": workers,
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+            "worker_rss_mb": round(sum(m.get("Rss", 0) for m in memory) / 1024, 1),
+            "worker_pss_mb": round(sum(m.get("Pss", 0) for m in memory) / 1024, 1),
+            "worker_private_mb": round(sum(m.get("Private_Clean", 0) + m.get("Private_Dirty", 0) for m in memory) / 1024, 1),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Requests/s of the pre-forked server by worker count")
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--listings", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per load generator process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_workers_")
+    try:
+        listings = synthetic_listings(args.listings)
+        for i, listing in enumerate(listings):
+            listing["id"] = f"L{i}"
+        catalog_path = os.path.join(directory, "listings.jsonl")
+        write_catalog(catalog_path, listings)
+        del listings
+        env = {
+            **os.environ,
+            "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "fake-key"),
+            "CATALOG_PATH": catalog_path,
+            # Built and saved by the first run, memory-mapped by every worker after that
+            "LISTING_INDEX_DIR": os.path.join(directory, "index"),
+            "STARTUP_WARMUP": "off",
+            "LOG_LEVEL": "WARNING",
+        }
+        rows = [
+            run(int(workers), env, args.port, args.clients, args.concurrency, args.seconds, args.warmup)
+            for workers in args.workers.split(",")
+        ]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    base = rows[0]["throughput_rps"] or 1
+    for row in rows:
+        row["speedup"] = round(row["throughput_rps"] / base, 2)
+    report = {"cpu_count": os.cpu_count(), "listings": args.listings, "clients": args.clients,
+              "concurrency": args.concurrency, "runs": rows}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,39 @@
+# synthetic.py
+# Seeded synthetic listings shaped like catalog/listings.py, for benchmarks.
+
+import random
+
+PROPERTY_TYPES = ["villa", "single_family", "townhouse", "condo", "estate", "studio", "apartment", "commercial"]
+NEIGHBORHOODS = ["Beverly Hills", "Suburban Heights", "University Area", "Historic District", "Downtown", "Harbor View",
+                 "Highland Ridge", "Arts District", "Financial District", "Park View", "Midtown", "Lakeside", "Old Town"]
+STATES = ["CA", "CO", "NY", "TX", "WA", "FL"]
+FEATURES = ["Balcony", "Chef kitchen", "In-unit laundry", "Fireplace", "Private dock", "Smart home", "Home theater",
+            "Walk-in closet", "Hardwood floors", "Courtyard access", "Private patio", "Attached garage", "Terrace",
+            "Wine fridge", "Guest house", "Wraparound deck", "High ceilings", "Exposed brick", "Pool", "Gym"]
+ADJECTIVES = ["Modern", "Cozy", "Luxury", "Historic", "Sunny", "Spacious", "Charming", "Waterfront", "Quiet", "Bright"]
+NOUNS = {"villa": "Villa", "single_family": "Family Home", "townhouse": "Townhouse", "condo": "Condo", "estate": "Estate",
+         "studio": "Studio Loft", "apartment": "Apartment", "commercial": "Office Suite"}
+
+
+def synthetic_listings(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        listing_type = "sale" if rng.random() < 0.5 else "rent"
+        property_type = rng.choice(PROPERTY_TYPES)
+        neighborhood = rng.choice(NEIGHBORHOODS)
+        features = rng.sample(FEATURES, rng.randint(2, 4))
+        beds = 0 if property_type == "commercial" else rng.randint(1, 6)
+        listings.append({
+            "name": f"{rng.choice(ADJECTIVES)} {NOUNS[property_type]} #{i}",
+            "description": f"{rng.choice(ADJECTIVES)} {NOUNS[property_type].lower()} in {neighborhood} with {features[0].lower()} and {features[1].lower()}.",
+            "price": rng.randrange(300_000, 3_000_000, 1_000) if listing_type == "sale" else rng.randrange(900, 12_000, 50),
+            "type": listing_type,
+            "typeofproperty": property_type,
+            "location": f"{neighborhood}, {rng.choice(STATES)}",
+            "beds": beds,
+            "baths": max(1, beds - rng.randint(0, 2)),
+            "sqft": rng.randrange(500, 5_000, 10),
+            "features": features,
+        })
+    return listings
@@ -0,0 +1,138 @@
+# columnar.py
+# Compact, column-oriented copy of the catalog. Numbers live in typed arrays,
+# repeated strings (type, location, features) are interned, and each listing's
+# text rendering is built once and reused by every tool call.
+
+import sys
+from array import array
+
+NUMERIC_FIELDS = ("price", "beds", "baths", "sqft")
+TEXT_FIELDS = ("name", "description", "type", "typeofproperty", "location")
+FIELDS = ("name", "description", "price", "type", "typeofproperty", "location", "beds", "baths", "sqft", "features")
+LISTING_TYPES = ("sale", "rent")
+MAX_NUMBER = 2**63 - 1  # the numeric columns are signed 64-bit arrays
+
+
+def render_listing(record: dict) -> str:
+    """One compact line per listing, e.g.
+    'Modern Condo | condo for sale | Downtown, CA | $380,000 | 2 bd/2 ba | 1,100 sqft | Balcony, Walk-in closet | Contemporary condo ...'
+    """
+    price = f"${record['price']:,}" + ("/mo" if record["type"] == "rent" else "")
+    return " | ".join((
+        record["name"],
+        f"{record['typeofproperty']} for {record['type']}",
+        record["location"],
+        price,
+        f"{record['beds']} bd/{record['baths']} ba",
+        f"{record['sqft']:,} sqft",
+        ", ".join(record["features"]),
+        record["description"],
+    ))
+
+
+def external_id(listing: dict) -> str:
+    """The id a catalog file gives a listing; the built-in catalog has none, so its names stand in."""
+    return str(listing.get("id") or listing["name"])
+
+
+def checked_listing(listing) -> dict:
+    """`listing` with every field present and well typed (numbers as ints, features
+    as a list of strings) and its "id" set; ValueError describing the first problem otherwise.
+    """
+    if not isinstance(listing, dict):
+        raise ValueError(f"expected an object, got {type(listing).__name__}")
+    missing = [name for name in FIELDS if name not in listing]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    checked = {"id": external_id(listing)}
+    for name in FIELDS:
+        value = listing[name]
+        if name in TEXT_FIELDS:
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string, got {value!r}")
+        elif name in NUMERIC_FIELDS:
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ValueError(f"{name} must be a number, got {value!r}")
+            try:
+                value = value if isinstance(value, int) else int(float(value))
+            except (ValueError, OverflowError):
+                raise ValueError(f"{name} must be a number, got {value!r}") from None
+            if not 0 <= value <= MAX_NUMBER:
+                raise ValueError(f"{name} out of range: {value}")
+        elif not isinstance(value, (list, tuple)) or not all(isinstance(feature, str) for feature in value):
+            raise ValueError(f"{name} must be a list of strings, got {value!r}")
+        checked[name] = value
+    if checked["type"] not in LISTING_TYPES:
+        raise ValueError(f"type must be one of {', '.join(LISTING_TYPES)}, got {checked['type']!r}")
+    return checked
+
+
+class ListingColumns:
+    """The catalog as parallel columns; listing ids are row positions (`external_id` holds the catalog's own ids)."""
+
+    def __init__(self, listings=(), checked: bool = False):
+        self.external_id: list[str] = []
+        self.name: list[str] = []
+        self.description: list[str] = []
+        self.type: list[str] = []
+        self.typeofproperty: list[str] = []
+        self.location: list[str] = []
+        self.features: list[tuple[str, ...]] = []
+        self.price = array("q")
+        self.beds = array("q")
+        self.baths = array("q")
+        self.sqft = array("q")
+        self._rendered: list[str | None] = []
+        for listing in listings:
+            self.append(listing, checked)
+
+    def append(self, listing: dict, checked: bool = False) -> int:
+        """Add a row. The listing is checked first (skipped when `checked`: it came from
+        `checked_listing`), so a bad one raises ValueError and leaves the columns as they were.
+        """
+        if not checked:
+            listing = checked_listing(listing)
+        intern = sys.intern
+        self.external_id.append(external_id(listing))
+        self.name.append(listing["name"])
+        self.description.append(listing["description"])
+        self.type.append(intern(listing["type"]))
+        self.typeofproperty.append(intern(listing["typeofproperty"]))
+        self.location.append(intern(listing["location"]))
+        self.features.append(tuple(intern(feature) for feature in listing["features"]))
+        for field in NUMERIC_FIELDS:
+            getattr(self, field).append(listing[field])
+        self._rendered.append(None)
+        return len(self.name) - 1
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def record(self, listing_id: int) -> dict:
+        """Materialize one listing as the plain dict the rest of the app expects."""
+        return {
+            "id": self.external_id[listing_id],
+            "name": self.name[listing_id],
+            "description": self.description[listing_id],
+            "price": self.price[listing_id],
+            "type": self.type[listing_id],
+            "typeofproperty": self.typeofproperty[listing_id],
+            "location": self.location[listing_id],
+            "beds": self.beds[listing_id],
+            "baths": self.baths[listing_id],
+            "sqft": self.sqft[listing_id],
+            "features": list(self.features[listing_id]),
+        }
+
+    def records(self, listing_ids) -> list[dict]:
+        return [self.record(i) for i in listing_ids]
+
+    def rendered(self, listing_id: int) -> str:
+        text = self._rendered[listing_id]
+        if text is None:
+            text = self._rendered[listing_id] = render_listing(self.record(listing_id))
+        return text
+
+    def render(self, listing_ids) -> str:
+        """Concatenate the cached renderings; nothing is re-encoded after the first call."""
+        return "\n".join(self.rendered(i) for i in listing_ids)
@@ -0,0 +1,354 @@
+# external.py
+# Listing catalog kept outside the code: a JSONL, Parquet or SQLite file with one
+# listing per line/row, keyed by its "id". The file is streamed (JSONL is read
+# through mmap, SQLite through a cursor, Parquet in record batches), and after a
+# change only the listings whose raw bytes differ are parsed again, so a reload
+# yields a diff by id that ListingStore.apply() turns into per-row index updates.
+# Rows that are not valid JSON or lack a well-typed field are skipped and reported;
+# a listing whose edited row is bad keeps its last good version.
+
+import asyncio
+import json
+import mmap
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+
+from catalog.columnar import FIELDS, checked_listing, external_id
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    from watchfiles import awatch
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet", ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"}
+SQLITE_TABLE = "listings"
+PARQUET_BATCH = 65_536
+PARSE_BATCH = 4096
+POLL_INTERVAL = 2.0
+MAX_REPORTED_ERRORS = 20
+
+
+def catalog_format(path: str) -> str:
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"unsupported catalog file {path!r} (expected one of {', '.join(sorted(FORMATS))})")
+    if fmt == "parquet" and not PARQUET_AVAILABLE:
+        raise ValueError("reading a Parquet catalog needs pyarrow")
+    return fmt
+
+
+def _listing(record: dict) -> dict:
+    """A catalog row as the checked listing dict the store expects (SQLite keeps features as JSON text)."""
+    if isinstance(record, dict) and isinstance(record.get("features"), str):
+        record = {**record, "features": json.loads(record["features"])}
+    return checked_listing(record)
+
+
+@dataclass
+class RejectedRow:
+    """A catalog row that could not be used; `listing_id` is None when the row has no readable id."""
+
+    listing_id: str | None
+    error: str
+
+    def __str__(self) -> str:
+        return f"{self.listing_id or '(no id)'}: {self.error}"
+
+
+def _rejected(record, error: Exception) -> RejectedRow:
+    listing_id = None
+    if isinstance(record, dict) and (record.get("id") or record.get("name")) is not None:
+        listing_id = external_id(record)
+    return RejectedRow(listing_id, str(error))
+
+
+def file_signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class CatalogDiff:
+    """Listings that changed in the file since the last load or diff, by id."""
+
+    upserts: dict[str, dict] = field(default_factory=dict)
+    deleted: set[str] = field(default_factory=set)
+    rejected: list[RejectedRow] = field(default_factory=list)
+    unchanged: int = 0
+    seconds: float = 0.0
+    # What CatalogSync.commit() records once the diff is applied
+    signature: tuple[int, int] | None = None
+    ids_by_digest: dict[int, str] = field(default_factory=dict, repr=False)
+    listings: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.upserts or self.deleted)
+
+
+class CatalogSync:
+    """Keeps track of a catalog file's contents so a re-read only parses what changed.
+
+    Every raw record (a JSONL line, a SQLite row, a Parquet row) is remembered by a
+    digest; a record whose digest was seen before is unchanged and is skipped
+    without parsing. `load()` returns every listing, `diff()` only the changes, and
+    `commit(diff)` makes a diff the new baseline once the store has applied it (a
+    diff that failed to apply is simply found again by the next one).
+    """
+
+    def __init__(self, path: str, table: str = SQLITE_TABLE):
+        self.path = path
+        self.format = catalog_format(path)
+        self.table = table
+        self._ids_by_digest: dict[int, str] = {}
+        self.signature: tuple[int, int] | None = None
+        self.listings = 0
+        self.loads = 0
+        self.reloads = 0
+        self.last_diff: dict | None = None
+        self.rejected: list[str] = []  # the bad rows of the last load or diff
+
+    # ---------------------------------------------------------------- readers
+
+    def _records(self):
+        """(digest, raw record) for every record in the file, streamed."""
+        if self.format == "jsonl":
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for line in iter(mapped.readline, b""):
+                        line = line.strip()
+                        if line:
+                            yield hash(line), line
+        elif self.format == "sqlite":
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                cursor = connection.execute(f"SELECT * FROM {self.table}")
+                columns = [description[0] for description in cursor.description]
+                for row in cursor:
+                    yield hash(row), (columns, row)
+            finally:
+                connection.close()
+        else:
+            for batch in pq.ParquetFile(self.path, memory_map=True).iter_batches(batch_size=PARQUET_BATCH):
+                for record in batch.to_pylist():
+                    yield hash(json.dumps(record, sort_keys=True, default=str)), record
+
+    def _decode(self, raws: list) -> list:
+        """Raw records as dicts, or the exception a record could not be decoded with."""
+        if self.format == "jsonl":
+            try:
+                # One decode call per batch: per-call overhead dominates on small objects
+                return json.loads(b"[" + b",".join(raws) + b"]")
+            except ValueError:
+                pass
+            records = []
+            for raw in raws:
+                try:
+                    records.append(json.loads(raw))
+                except ValueError as error:
+                    records.append(ValueError(f"invalid JSON ({error})"))
+            return records
+        if self.format == "sqlite":
+            return [dict(zip(columns, row)) for columns, row in raws]
+        return raws
+
+    def _parse(self, raws: list) -> list[dict | RejectedRow]:
+        """A checked listing for each raw record, or a RejectedRow saying why it cannot be used."""
+        parsed = []
+        for record in self._decode(raws):
+            if isinstance(record, Exception):
+                parsed.append(RejectedRow(None, str(record)))
+                continue
+            try:
+                parsed.append(_listing(record))
+            except ValueError as error:
+                parsed.append(_rejected(record, error))
+        return parsed
+
+    def _report(self, rejected: list[RejectedRow]):
+        self.rejected = [str(row) for row in rejected[:MAX_REPORTED_ERRORS]]
+
+    def _batches(self, batch: int = PARSE_BATCH):
+        """(digests, raw records) in lists of up to `batch`."""
+        digests, raws = [], []
+        for digest, raw in self._records():
+            digests.append(digest)
+            raws.append(raw)
+            if len(raws) >= batch:
+                yield digests, raws
+                digests, raws = [], []
+        if raws:
+            yield digests, raws
+
+    # ---------------------------------------------------------------- loading
+
+    def load(self) -> list[dict]:
+        """Read the whole catalog (later rows win when an id repeats)."""
+        started = time.perf_counter()
+        self.signature = file_signature(self.path)
+        listings: dict[str, dict] = {}
+        rejected: list[RejectedRow] = []
+        self._ids_by_digest = {}
+        for digests, raws in self._batches():
+            for digest, listing in zip(digests, self._parse(raws)):
+                if isinstance(listing, RejectedRow):
+                    rejected.append(listing)
+                    continue
+                listings.pop(listing["id"], None)
+                listings[listing["id"]] = listing
+                self._ids_by_digest[digest] = listing["id"]
+        self.listings = len(listings)
+        self.loads += 1
+        self._report(rejected)
+        self.last_diff = {"added": len(listings), "updated": 0, "deleted": 0, "rejected": len(rejected),
+                          "seconds": round(time.perf_counter() - started, 4)}
+        return list(listings.values())
+
+    def diff(self) -> CatalogDiff:
+        """Re-read the file and return what changed since the last `load()` or committed diff."""
+        started = time.perf_counter()
+        diff = CatalogDiff(signature=file_signature(self.path))
+        ids_by_digest = diff.ids_by_digest
+        seen: set[str] = set()
+        known = self._ids_by_digest
+        digests_by_id: dict[str, list[int]] | None = None
+        for digests, raws in self._batches():
+            changed = []
+            for digest, raw in zip(digests, raws):
+                listing_id = known.get(digest)
+                if listing_id is None:
+                    changed.append((digest, raw))
+                    continue
+                ids_by_digest[digest] = listing_id
+                seen.add(listing_id)
+            diff.unchanged += len(digests) - len(changed)
+            if changed:
+                for (digest, _), listing in zip(changed, self._parse([raw for _, raw in changed])):
+                    if isinstance(listing, RejectedRow):
+                        diff.rejected.append(listing)
+                        if listing.listing_id is not None and listing.listing_id not in diff.upserts:
+                            # Keep the last good version rather than deleting the listing
+                            if digests_by_id is None:
+                                digests_by_id = {}
+                                for old_digest, listing_id in known.items():
+                                    digests_by_id.setdefault(listing_id, []).append(old_digest)
+                            for old_digest in digests_by_id.get(listing.listing_id, ()):
+                                ids_by_digest[old_digest] = listing.listing_id
+                                seen.add(listing.listing_id)
+                        continue
+                    diff.upserts.pop(listing["id"], None)
+                    diff.upserts[listing["id"]] = listing
+                    ids_by_digest[digest] = listing["id"]
+                    seen.add(listing["id"])
+        diff.deleted = set(known.values()) - seen
+        diff.listings = len(seen)
+        diff.seconds = time.perf_counter() - started
+        return diff
+
+    def commit(self, diff: CatalogDiff):
+        """Make `diff` the baseline for the next one; call it once the store has applied the diff."""
+        self.signature = diff.signature
+        self._ids_by_digest = diff.ids_by_digest
+        self.listings = diff.listings
+        self.reloads += 1
+        self._report(diff.rejected)
+        self.last_diff = {
+            "upserts": len(diff.upserts),
+            "deleted": len(diff.deleted),
+            "rejected": len(diff.rejected),
+            "unchanged": diff.unchanged,
+            "seconds": round(diff.seconds, 4),
+        }
+
+    def changed(self) -> bool:
+        return file_signature(self.path) != self.signature
+
+    def snapshot(self) -> dict:
+        return {
+            "path": self.path,
+            "format": self.format,
+            "listings": self.listings,
+            "loads": self.loads,
+            "reloads": self.reloads,
+            "last_diff": self.last_diff,
+            "rejected": self.rejected,
+        }
+
+
+class CatalogWatcher:
+    """Calls `on_change()` (async) after the catalog file changes.
+
+    Uses watchfiles when it is installed (it comes with uvicorn[standard]) and
+    falls back to polling the file's mtime and size every `interval` seconds. The
+    parent directory is watched, so files replaced by rename are picked up too.
+    """
+
+    def __init__(self, sync: CatalogSync, on_change, interval: float = POLL_INTERVAL):
+        self.sync = sync
+        self.on_change = on_change
+        self.interval = interval
+        self.errors = 0
+        self.last_error: str | None = None
+
+    async def _fire(self):
+        if not self.sync.changed():
+            return
+        try:
+            await self.on_change()
+        except Exception as error:
+            self.errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    async def run(self):
+        if WATCHFILES_AVAILABLE:
+            target = os.path.abspath(self.sync.path)
+            async for _ in awatch(os.path.dirname(target), watch_filter=lambda change, path: path == target):
+                await self._fire()
+        else:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self._fire()
+
+
+def write_catalog(path: str, listings, table: str = SQLITE_TABLE):
+    """Write `listings` (dicts with an "id", else the name is used) as a catalog file for `path`'s format."""
+    fmt = catalog_format(path)
+    rows = ({**{name: listing[name] for name in FIELDS}, "id": external_id(listing)} for listing in listings)
+    tmp = path + ".tmp"
+    if fmt == "jsonl":
+        with open(tmp, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    elif fmt == "sqlite":
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        connection = sqlite3.connect(tmp)
+        with connection:
+            connection.execute(
+                f"CREATE TABLE {table} (id TEXT PRIMARY KEY, name TEXT, description TEXT, price INTEGER, type TEXT,"
+                " typeofproperty TEXT, location TEXT, beds INTEGER, baths INTEGER, sqft INTEGER, features TEXT)"
+            )
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {table} VALUES (:id, :name, :description, :price, :type, :typeofproperty, :location, :beds, :baths, :sqft, :features)",
+                ({**row, "features": json.dumps(row["features"])} for row in rows),
+            )
+        connection.close()
+    else:
+        import pyarrow as pa
+
+        pq.write_table(pa.Table.from_pylist(list(rows)), tmp)
+    # Renamed into place so a watcher never reads a half-written file
+    os.replace(tmp, path)
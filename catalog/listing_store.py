@@ -0,0 +1,610 @@
+# listing_store.py
+# In-memory listing store with precomputed indexes so the property tools only
+# hand the model the handful of listings that actually match the user's query.
+
+import heapq
+import re
+import threading
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from bisect import bisect_left, bisect_right
+from itertools import compress, filterfalse, islice
+
+from catalog.columnar import ListingColumns, checked_listing
+
+DEFAULT_LIMIT = 10
+# retrieve_ids ranks up to this many structured matches as a candidate set; broader
+# filters rank the whole index and keep the fused hits (both retrievers' pools) that pass
+RANK_CANDIDATES = 2000
+BROAD_RANK_K = 200
+_UNBUILT = object()
+
+# Exact-match filters a query can be bucketed by for cache invalidation (beds/baths are
+# not: query_ids relaxes "3 bed" to "at least 3 beds")
+BUCKET_FIELDS = {"name": "by_name", "location": "by_location", "typeofproperty": "by_property_type", "type": "by_type"}
+
+# Words users type for each `typeofproperty` value in the catalog
+PROPERTY_TYPE_SYNONYMS = {
+    "villa": "villa",
+    "condo": "condo",
+    "condominium": "condo",
+    "townhouse": "townhouse",
+    "townhome": "townhouse",
+    "apartment": "apartment",
+    "apt": "apartment",
+    "flat": "apartment",
+    "penthouse": "apartment",
+    "studio": "studio",
+    "loft": "studio",
+    "estate": "estate",
+    "house": "single_family",
+    "cabin": "single_family",
+    "single family": "single_family",
+    "single-family": "single_family",
+    "commercial": "commercial",
+    "office": "commercial",
+}
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_'-]+")
+_AMOUNT = r"\$?\s*(\d+(?:[.,]\d+)*)\s*(k|m|mm|million|thousand)?"
+_PRICE_MAX_RE = re.compile(r"(?:under|below|less than|max(?:imum)?|up to|at most|cheaper than|<)\s*" + _AMOUNT, re.I)
+_PRICE_MIN_RE = re.compile(r"(?:over|above|more than|min(?:imum)?|at least|from|>)\s*" + _AMOUNT, re.I)
+_PRICE_BETWEEN_RE = re.compile(r"between\s*" + _AMOUNT + r"\s*(?:and|-|to)\s*" + _AMOUNT, re.I)
+_SQFT_RE = re.compile(r"(under|below|less than|over|above|more than|at least)?\s*(\d+(?:,\d+)*)\s*(?:sq\.?\s*ft|sqft|square\s*feet|sf)\b", re.I)
+_BEDS_RE = re.compile(r"(\d+)\s*(\+)?\s*-?\s*(?:bed|beds|bedroom|bedrooms|br|bd)\b", re.I)
+_BATHS_RE = re.compile(r"(\d+)\s*(\+)?\s*-?\s*(?:bath|baths|bathroom|bathrooms|ba)\b", re.I)
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def _parse_amount(number: str, suffix: str | None) -> float:
+    value = float(number.replace(",", ""))
+    suffix = (suffix or "").lower()
+    if suffix in ("k", "thousand"):
+        value *= 1_000
+    elif suffix in ("m", "mm", "million"):
+        value *= 1_000_000
+    return value
+
+
+def _location_parts(location: str) -> list[str]:
+    """'Beverly Hills, CA' -> ['beverly hills, ca', 'beverly hills', 'ca']"""
+    full = _normalize(location)
+    parts = [full]
+    for part in full.split(","):
+        part = part.strip()
+        if part and part not in parts:
+            parts.append(part)
+    return parts
+
+
+class _RangeIndex:
+    """Values sorted once at load time so range filters are two bisects; `merged` builds the arrays after a diff."""
+
+    def __init__(self, column, dead=()):
+        order = sorted((i for i in range(len(column)) if i not in dead), key=column.__getitem__)
+        self.values = array("q", (column[i] for i in order))
+        self.ids = array("q", order)
+
+    def merged(self, removed: dict[int, int], added: list[tuple[int, int]]) -> tuple[array, array]:
+        """New (values, ids) arrays without the `removed` {id: value} entries and with the `added`
+        (value, id) ones merged in; the index itself is untouched, so this can run beside searches.
+        """
+        keep = [listing_id not in removed for listing_id in self.ids]
+        values, ids = array("q", compress(self.values, keep)), array("q", compress(self.ids, keep))
+        merged_values, merged_ids = array("q"), array("q")
+        last = 0
+        for value, listing_id in sorted(added):
+            # Equal values stay in id order, so a listing is found by bisecting both arrays
+            start = bisect_left(values, value, last)
+            position = bisect_left(ids, listing_id, start, bisect_right(values, value, start))
+            merged_values.extend(values[last:position])
+            merged_ids.extend(ids[last:position])
+            merged_values.append(value)
+            merged_ids.append(listing_id)
+            last = position
+        merged_values.extend(values[last:])
+        merged_ids.extend(ids[last:])
+        return merged_values, merged_ids
+
+    def between(self, low=None, high=None):
+        start = 0 if low is None else bisect_left(self.values, low)
+        stop = len(self.values) if high is None else bisect_right(self.values, high)
+        return self.ids[start:stop]
+
+
+class _ReadWriteLock:
+    """Any number of readers or one writer; a waiting writer holds off new readers. Not reentrant."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+def listing_tag(external_id: str) -> str:
+    return f"listing:{external_id}"
+
+
+@dataclass
+class CatalogChanges:
+    """What `ListingStore.apply` changed, by catalog id, and the cache tags it invalidates."""
+
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    cache_tags: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+
+@dataclass
+class _StagedDiff:
+    """A diff checked and pre-indexed by `ListingStore._stage`, ready for `_commit`."""
+
+    first_row: int  # the upserts become rows first_row, first_row + 1, ...
+    listings: list[tuple[str, dict]]  # (catalog id, checked listing) per upsert
+    deleted: dict[str, int]  # catalog id -> live row to drop
+    replaced: dict[str, int]  # catalog id -> live row an upsert replaces
+    ranges: list[tuple[array, array]]  # merged arrays for the price and sqft indexes
+    embedded: list | None  # prepared text-index batches, if the text index was built
+
+
+class ListingStore:
+    """Loads the catalog once and answers structured filters from its indexes."""
+
+    def __init__(self, listings, index_dir: str | None = None):
+        self.columns = columns = listings if isinstance(listings, ListingColumns) else ListingColumns(listings)
+        self.by_type: dict[str, set[int]] = {}
+        self.by_property_type: dict[str, set[int]] = {}
+        self.by_location: dict[str, set[int]] = {}
+        self.by_name: dict[str, set[int]] = {}
+        self.by_beds: dict[int, set[int]] = {}
+        self.by_baths: dict[int, set[int]] = {}
+
+        # Type and location values repeat heavily, so normalize each distinct value once
+        self._keys: dict[str, str] = {}
+        self._locations: dict[str, list[str]] = {}
+        # Catalog id -> live row; rows replaced or deleted by `apply` stay in the columns as dead rows
+        self.rows: dict[str, int] = {}
+        self.dead: set[int] = set()
+        for listing_id in range(len(columns)):
+            self._index_row(listing_id)
+
+        self.price = _RangeIndex(columns.price, self.dead)
+        self.sqft = _RangeIndex(columns.sqft, self.dead)
+
+        # Longest phrase worth looking up when matching query n-grams
+        phrases = list(self.by_location) + list(self.by_name) + list(PROPERTY_TYPE_SYNONYMS)
+        self._max_phrase_words = min(6, max((len(p.split()) for p in phrases), default=1))
+
+        # Hybrid text index for ranking matches by wording, built (or loaded from index_dir) on first use
+        self.index_dir = index_dir
+        self._text_index = _UNBUILT
+        self._text_index_lock = threading.Lock()
+        self._guard = _ReadWriteLock()
+
+    def _key(self, value: str) -> str:
+        key = self._keys.get(value)
+        if key is None:
+            key = self._keys[value] = _normalize(value)
+        return key
+
+    def _location_keys(self, location: str) -> list[str]:
+        parts = self._locations.get(location)
+        if parts is None:
+            parts = self._locations[location] = _location_parts(location)
+        return parts
+
+    def _row_entries(self, listing_id: int):
+        """(field, index, key) of every exact-match index a row is listed in."""
+        columns = self.columns
+        yield "type", self.by_type, self._key(columns.type[listing_id])
+        yield "typeofproperty", self.by_property_type, self._key(columns.typeofproperty[listing_id])
+        for part in self._location_keys(columns.location[listing_id]):
+            yield "location", self.by_location, part
+        yield "name", self.by_name, _normalize(columns.name[listing_id])
+        yield "beds", self.by_beds, columns.beds[listing_id]
+        yield "baths", self.by_baths, columns.baths[listing_id]
+
+    def _index_row(self, listing_id: int):
+        for _, index, key in self._row_entries(listing_id):
+            index.setdefault(key, set()).add(listing_id)
+        previous = self.rows.get(self.columns.external_id[listing_id])
+        if previous is not None:
+            # A catalog listing the same id twice keeps the last one
+            self._unindex_row(previous)
+        self.rows[self.columns.external_id[listing_id]] = listing_id
+
+    def _unindex_row(self, listing_id: int):
+        for _, index, key in self._row_entries(listing_id):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(listing_id)
+                if not ids:
+                    del index[key]
+        if self.rows.get(self.columns.external_id[listing_id]) == listing_id:
+            del self.rows[self.columns.external_id[listing_id]]
+        self.dead.add(listing_id)
+
+    def __len__(self) -> int:
+        return len(self.columns) - len(self.dead)
+
+    def _live_ids(self):
+        """Row ids of the current listings, in catalog order."""
+        rows = range(len(self.columns))
+        return filterfalse(self.dead.__contains__, rows) if self.dead else iter(rows)
+
+    def render(self, listing_ids) -> str:
+        return self.columns.render(listing_ids)
+
+    @property
+    def text_index(self):
+        """BM25 + vector index over each listing's name, type, location, features and description; None without numpy."""
+        if self._text_index is _UNBUILT:
+            with self._text_index_lock:
+                if self._text_index is _UNBUILT:
+                    self._text_index = self._open_text_index()
+        return self._text_index
+
+    def _open_text_index(self):
+        try:
+            from retrieval.hybrid import open_index
+        except ImportError:  # numpy is optional; matches then keep catalog order
+            return None
+        from retrieval.text import listing_text
+
+        columns = self.columns
+        return open_index(self.index_dir, ((i, listing_text(columns.record(i))) for i in range(len(columns))))
+
+    # ---------------------------------------------------------------- incremental updates
+
+    def reading(self):
+        """Hold this while searching the store from anywhere `apply` may run concurrently with."""
+        return self._guard.read()
+
+    def apply(self, upserts: dict, deleted=()) -> "CatalogChanges":
+        """Apply a catalog diff in place: `upserts` maps catalog ids to new or changed
+        listings, `deleted` lists ids to drop.
+
+        Only the touched rows are re-indexed (exact-match sets, range indexes and
+        the text index if it is built); a changed listing becomes a new row and its
+        old row is left dead until `compacted()`. The listings are checked and the
+        new range arrays and text embeddings built first, beside searches; a listing
+        that fails `checked_listing` raises ValueError with the store unchanged. Only
+        swapping the result in holds the write side of `reading()`, so apply can run
+        in a worker thread. Calls to apply must not overlap.
+        """
+        return self._commit(self._stage(upserts, deleted))
+
+    def _stage(self, upserts: dict, deleted) -> _StagedDiff:
+        columns = self.columns
+        first_row = len(columns)
+        listings = [(key, checked_listing({**listing, "id": key})) for key, listing in upserts.items()]
+        gone = {key: self.rows[key] for key in deleted if key in self.rows}
+        replaced = {key: self.rows[key] for key, _ in listings if key in self.rows and key not in gone}
+        removed_rows = [*gone.values(), *replaced.values()]
+        new_rows = range(first_row, first_row + len(listings))
+        ranges = [
+            index.merged({row: column[row] for row in removed_rows}, [(listing[name], row) for (_, listing), row in zip(listings, new_rows)])
+            for index, column, name in ((self.price, columns.price, "price"), (self.sqft, columns.sqft, "sqft"))
+        ]
+        text_index = self._text_index
+        embedded = None
+        if text_index is not _UNBUILT and text_index is not None and listings:
+            from retrieval.text import listing_text
+
+            embedded = text_index.prepare((row, listing_text(listing)) for (_, listing), row in zip(listings, new_rows))
+        return _StagedDiff(first_row, listings, gone, replaced, ranges, embedded)
+
+    def _commit(self, staged: _StagedDiff) -> "CatalogChanges":
+        changes = CatalogChanges()
+        columns = self.columns
+        with self._guard.write(), self._text_index_lock:
+            if len(columns) != staged.first_row:
+                raise RuntimeError("the store changed after the diff was staged")
+            text_index = None if self._text_index is _UNBUILT else self._text_index
+            for key, row in staged.deleted.items():
+                self._unindex_row(row)
+                if text_index is not None:
+                    text_index.remove(row)
+                changes.deleted.append(key)
+                changes.cache_tags.add(listing_tag(key))
+            for key, listing in staged.listings:
+                old = staged.replaced.get(key)
+                if old is not None:
+                    self._unindex_row(old)
+                    if text_index is not None:
+                        text_index.remove(old)
+                    changes.updated.append(key)
+                    changes.cache_tags.add(listing_tag(key))
+                else:
+                    changes.added.append(key)
+                row = columns.append(listing, checked=True)
+                self._index_row(row)
+                # A new or changed listing can now match queries whose cached answers did not show it
+                changes.cache_tags.update(self._bucket_tags(row))
+                self._max_phrase_words = min(6, max(
+                    self._max_phrase_words, len(_normalize(columns.name[row]).split()), len(_normalize(columns.location[row]).split()),
+                ))
+            for index, (values, ids) in zip((self.price, self.sqft), staged.ranges):
+                index.values, index.ids = values, ids
+            if text_index is not None and staged.listings:
+                if staged.embedded is not None:
+                    text_index.add_prepared(staged.embedded)
+                else:  # built after the diff was staged
+                    from retrieval.text import listing_text
+
+                    text_index.add_many((row, listing_text(columns.record(row))) for row in range(staged.first_row, len(columns)))
+        return changes
+
+    def compacted(self) -> "ListingStore":
+        """A fresh store holding only the live listings (dead rows from `apply` dropped)."""
+        return ListingStore(ListingColumns(self.columns.records(self._live_ids()), checked=True), index_dir=self.index_dir)
+
+    def _bucket_tags(self, listing_id: int) -> list[str]:
+        return ["catalog:*"] + [f"catalog:{field}={key}" for field, _, key in self._row_entries(listing_id) if field in BUCKET_FIELDS]
+
+    def cache_tags(self, query: str, listing_ids, **fixed_filters) -> list[str]:
+        """What an answer built from `query_ids`/`retrieve_ids(query)` depends on, for targeted cache invalidation.
+
+        That is the listings it showed, plus the narrowest exact-match bucket (say
+        location=harbor view) that a newly added listing must fall in to match the
+        query as well.
+        """
+        filters = self.parse_query(query)
+        filters.update(fixed_filters)
+        buckets = []
+        for field, index_name in BUCKET_FIELDS.items():
+            if filters.get(field) is not None:
+                key = _normalize(filters[field])
+                buckets.append((len(getattr(self, index_name).get(key, ())), f"catalog:{field}={key}"))
+        tags = [listing_tag(self.columns.external_id[i]) for i in listing_ids]
+        tags.append(min(buckets)[1] if buckets else "catalog:*")
+        return tags
+
+    def _filter_plan(
+        self,
+        type: str | None = None,
+        typeofproperty: str | None = None,
+        location: str | None = None,
+        name: str | None = None,
+        beds: int | None = None,
+        min_beds: int | None = None,
+        baths: int | None = None,
+        min_baths: int | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_sqft: float | None = None,
+        max_sqft: float | None = None,
+    ) -> tuple[list, list]:
+        """Index hits (id sets or presorted range slices) and (column, low, high) value checks for the filters."""
+        sources: list = []
+        if type is not None:
+            sources.append(self.by_type.get(_normalize(type), set()))
+        if typeofproperty is not None:
+            sources.append(self.by_property_type.get(_normalize(typeofproperty), set()))
+        if location is not None:
+            sources.append(self.by_location.get(_normalize(location), set()))
+        if name is not None:
+            sources.append(self.by_name.get(_normalize(name), set()))
+        if beds is not None:
+            sources.append(self.by_beds.get(int(beds), set()))
+        if baths is not None:
+            sources.append(self.by_baths.get(int(baths), set()))
+
+        columns = self.columns
+        checks = []
+        if min_beds is not None:
+            checks.append((columns.beds, min_beds, None))
+        if min_baths is not None:
+            checks.append((columns.baths, min_baths, None))
+        if min_price is not None or max_price is not None:
+            sources.append(self.price.between(min_price, max_price))
+            checks.append((columns.price, min_price, max_price))
+        if min_sqft is not None or max_sqft is not None:
+            sources.append(self.sqft.between(min_sqft, max_sqft))
+            checks.append((columns.sqft, min_sqft, max_sqft))
+        return sources, checks
+
+    def search_ids(self, limit: int | None = DEFAULT_LIMIT, **filters) -> list[int]:
+        """Return ids of up to `limit` (None: all) listings matching every filter (see `_filter_plan`), in catalog order."""
+        sources, checks = self._filter_plan(**filters)
+        columns = self.columns
+        if not sources and not checks:
+            live = self._live_ids()
+            return list(live if limit is None else islice(live, limit))
+
+        # Seed from the most selective index; the rest become cheap membership/value checks
+        sources.sort(key=len)
+        seed = sources[0] if sources else None
+        others = [ids for ids in sources[1:] if isinstance(ids, set)]
+        size = len(columns)
+
+        def in_range(listing_id: int) -> bool:
+            for column, low, high in checks:
+                value = column[listing_id]
+                if (low is not None and value < low) or (high is not None and value > high):
+                    return False
+            return True
+
+        def passes(listing_id: int) -> bool:
+            for ids in others:
+                if listing_id not in ids:
+                    return False
+            return in_range(listing_id)
+
+        if limit is None:
+            # Every match (for totals and facets): intersect all index hits in C, then check min_beds/min_baths
+            sets = sorted((ids for ids in sources if isinstance(ids, set)), key=len)
+            for ids in sources:
+                # A range hit is only worth a set when it is the narrowest source
+                if not isinstance(ids, set) and (not sets or len(ids) < len(sets[0])):
+                    sets.insert(0, set(ids))
+            candidates = sets[0].intersection(*sets[1:]) if sets else self._live_ids()
+            return sorted(filter(in_range, candidates) if checks else candidates)
+
+        if seed is None or len(seed) * 8 > size:
+            # Broad filter: walk the catalog in order and stop once `limit` matches are found
+            if seed is not None and isinstance(seed, set):
+                others.append(seed)
+            return list(islice(filter(passes, self._live_ids()), limit))
+        return heapq.nsmallest(limit, filter(passes, seed))
+
+    def search(self, limit: int = DEFAULT_LIMIT, **filters) -> list[dict]:
+        """Like `search_ids` but returns the listings as dicts."""
+        return self.columns.records(self.search_ids(limit=limit, **filters))
+
+    def _phrases(self, query: str):
+        words = _WORD_RE.findall(query)
+        for size in range(min(self._max_phrase_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                yield words[start:start + size]
+
+    def parse_query(self, query: str) -> dict:
+        """Pull structured filters (property type, location, beds, baths, price, sqft) out of free text."""
+        filters: dict = {}
+        text = query or ""
+
+        for words in self._phrases(text):
+            phrase = _normalize(" ".join(words))
+            singular = phrase[:-1] if phrase.endswith("s") else phrase
+            if "name" not in filters and phrase in self.by_name:
+                filters["name"] = phrase
+            elif "location" not in filters and phrase in self.by_location:
+                # Two-letter state codes only count when typed as codes ("in CA", not "ca")
+                if len(phrase) > 2 or words[0].isupper():
+                    filters["location"] = phrase
+            if "typeofproperty" not in filters:
+                for candidate in (phrase, singular):
+                    if candidate in PROPERTY_TYPE_SYNONYMS:
+                        filters["typeofproperty"] = PROPERTY_TYPE_SYNONYMS[candidate]
+                        break
+                    if candidate in self.by_property_type:
+                        filters["typeofproperty"] = candidate
+                        break
+
+        between = _PRICE_BETWEEN_RE.search(text)
+        if between:
+            filters["min_price"] = _parse_amount(between.group(1), between.group(2))
+            filters["max_price"] = _parse_amount(between.group(3), between.group(4))
+        else:
+            for regex, key in ((_PRICE_MAX_RE, "max_price"), (_PRICE_MIN_RE, "min_price")):
+                for match in regex.finditer(text):
+                    # Leave "under 2000 sqft" to the sqft parser
+                    if _SQFT_RE.match(text, match.start()) or re.match(r"\s*(?:sq|square|sf\b|bed|bath|br\b|ba\b)", text[match.end():], re.I):
+                        continue
+                    filters[key] = _parse_amount(match.group(1), match.group(2))
+                    break
+
+        for match in _SQFT_RE.finditer(text):
+            qualifier = (match.group(1) or "").lower()
+            value = float(match.group(2).replace(",", ""))
+            if qualifier in ("under", "below", "less than"):
+                filters["max_sqft"] = value
+            else:
+                filters["min_sqft"] = value
+
+        beds = _BEDS_RE.search(text)
+        if beds:
+            filters["min_beds" if beds.group(2) else "beds"] = int(beds.group(1))
+        baths = _BATHS_RE.search(text)
+        if baths:
+            filters["min_baths" if baths.group(2) else "baths"] = int(baths.group(1))
+
+        return filters
+
+    def _accepts(self, **filters):
+        """Predicate for "this live listing passes every filter", to check a few ids without collecting all matches."""
+        sources, checks = self._filter_plan(**filters)
+        sets = [ids for ids in sources if isinstance(ids, set)]
+
+        def accepts(listing_id: int) -> bool:
+            for ids in sets:
+                if listing_id not in ids:
+                    return False
+            for column, low, high in checks:
+                value = column[listing_id]
+                if (low is not None and value < low) or (high is not None and value > high):
+                    return False
+            return True
+
+        return accepts
+
+    def _query(self, query: str, limit: int | None, fixed_filters: dict) -> tuple[dict, list[int]]:
+        """The filters `query` resolves to and up to `limit` of their matches."""
+        filters = self.parse_query(query)
+        filters.update(fixed_filters)
+        matches = self.search_ids(limit=limit, **filters)
+        if not matches and filters.get("beds") is not None:
+            # "3 bed" is often meant as "at least 3 beds"
+            filters["min_beds"] = filters.pop("beds")
+            matches = self.search_ids(limit=limit, **filters)
+        return filters, matches
+
+    def query_ids(self, query: str, limit: int = DEFAULT_LIMIT, **fixed_filters) -> list[int]:
+        """Parse `query` and return the top matching ids; `fixed_filters` (e.g. type="rent") always apply."""
+        return self._query(query, limit, fixed_filters)[1]
+
+    def retrieve_ids(self, query: str, limit: int = DEFAULT_LIMIT, **fixed_filters) -> list[int]:
+        """Like `query_ids`, but the matches most relevant to the wording of `query` come first.
+
+        The structured filters pick the candidates and the hybrid text index ranks
+        them, so "something cozy near the water with a fireplace" finds the lakeside
+        cabin. Ranking only reorders: matches the index scores below its thresholds
+        follow in catalog order, so the same listings come back as from `query_ids`
+        whenever they fit in `limit` (without numpy it is `query_ids` in catalog order).
+
+        Ranking is bounded: up to RANK_CANDIDATES matches are ranked as a candidate
+        set; broader filters rank the whole index (no per-match mask to build) and
+        keep the fused hits that pass them.
+        """
+        filters, matches = self._query(query, None, fixed_filters)
+        index = self.text_index if matches else None
+        if index is None:
+            return matches[:limit]
+        if len(matches) <= RANK_CANDIDATES or limit is None:
+            hits = index.search(query, k=limit or len(matches), candidates=None if len(matches) == len(self) else matches)
+        else:
+            accepts = self._accepts(**filters)
+            hits = [hit for hit in index.search(query, k=BROAD_RANK_K) if accepts(hit[0])][:limit]
+        ranked = [listing_id for listing_id, _ in hits]
+        if limit is None or len(ranked) < limit:
+            shown = set(ranked)
+            rest = (listing_id for listing_id in matches if listing_id not in shown)
+            ranked.extend(rest if limit is None else islice(rest, limit - len(ranked)))
+        return ranked
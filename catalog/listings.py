@@ -0,0 +1,228 @@
+# listings.py
+# Sale and rent inventory served by the SaleAgent and RentAgent tools.
+
+SALE_LISTINGS = [
+    {
+        "name": "Modern Luxury Villa",
+        "description": "An architectural masterpiece featuring floor-to-ceiling glass, open concept living, and an infinity-edge pool overlooking Beverly Hills.",
+        "price": 2500000,
+        "type": "sale",
+        "typeofproperty": "villa",
+        "location": "Beverly Hills, CA",
+        "beds": 5,
+        "baths": 4,
+        "sqft": 4200,
+        "features": [
+            "Open kitchen",
+            "Smart home",
+            "Home theater",
+            "3-car garage"
+        ]
+    },
+    {
+        "name": "Luxury Family Home",
+        "description": "Spacious family residence with bright interiors, landscaped backyard, and a quiet cul-de-sac address.",
+        "price": 750000,
+        "type": "sale",
+        "typeofproperty": "single_family",
+        "location": "Suburban Heights, CA",
+        "beds": 4,
+        "baths": 3,
+        "sqft": 2800,
+        "features": [
+            "Family room",
+            "Breakfast nook",
+            "Primary suite balcony"
+        ]
+    },
+    {
+        "name": "Investment Property",
+        "description": "Turn-key investment near the university, strong rental history and low vacancy.",
+        "price": 450000,
+        "type": "sale",
+        "typeofproperty": "townhouse",
+        "location": "University Area, CA",
+        "beds": 3,
+        "baths": 2,
+        "sqft": 1600,
+        "features": [
+            "Updated kitchen",
+            "Hardwood floors"
+        ]
+    },
+    {
+        "name": "Historic Townhouse",
+        "description": "Classic 1925 townhouse meticulously updated while preserving original character.",
+        "price": 1200000,
+        "type": "sale",
+        "typeofproperty": "townhouse",
+        "location": "Historic District, CA",
+        "beds": 5,
+        "baths": 4,
+        "sqft": 3200,
+        "features": [
+            "Crown molding",
+            "Chef kitchen",
+            "Library"
+        ]
+    },
+    {
+        "name": "Modern Condo",
+        "description": "Contemporary condo in the heart of downtown with amenities and parking.",
+        "price": 380000,
+        "type": "sale",
+        "typeofproperty": "condo",
+        "location": "Downtown, CA",
+        "beds": 2,
+        "baths": 2,
+        "sqft": 1100,
+        "features": [
+            "Balcony",
+            "Walk-in closet"
+        ]
+    },
+    {
+        "name": "Waterfront Estate",
+        "description": "Stunning waterfront estate with private dock and guest house.",
+        "price": 2500000,
+        "type": "sale",
+        "typeofproperty": "estate",
+        "location": "Harbor View, CA",
+        "beds": 6,
+        "baths": 5,
+        "sqft": 4500,
+        "features": [
+            "Guest house",
+            "Private dock",
+            "Gourmet kitchen"
+        ]
+    },
+    {
+        "name": "Mountain View Cabin",
+        "description": "Cozy cabin retreat with panoramic mountain views and modern finishes.",
+        "price": 590000,
+        "type": "sale",
+        "typeofproperty": "single_family",
+        "location": "Highland Ridge, CO",
+        "beds": 3,
+        "baths": 2,
+        "sqft": 1700,
+        "features": [
+            "Fireplace",
+            "Wraparound deck"
+        ]
+    }
+]
+
+RENT_LISTINGS = [
+    {
+        "name": "Waterfront Condo",
+        "description": "Stylish condo with a private balcony facing the harbor, concierge service, and residents-only fitness center.",
+        "price": 3200,
+        "type": "rent",
+        "typeofproperty": "condo",
+        "location": "Harbor View, CA",
+        "beds": 2,
+        "baths": 2,
+        "sqft": 1400,
+        "features": [
+            "Balcony",
+            "Chef kitchen",
+            "In-unit laundry"
+        ]
+    },
+    {
+        "name": "Cozy Studio Loft",
+        "description": "Charming loft with exposed brick and high ceilings in the vibrant Arts District.",
+        "price": 1800,
+        "type": "rent",
+        "typeofproperty": "studio",
+        "location": "Arts District, CA",
+        "beds": 1,
+        "baths": 1,
+        "sqft": 800,
+        "features": [
+            "High ceilings",
+            "Exposed brick"
+        ]
+    },
+    {
+        "name": "Modern Downtown Apartment",
+        "description": "Bright corner unit apartment with city skyline views and quick access to transit.",
+        "price": 2500,
+        "type": "rent",
+        "typeofproperty": "apartment",
+        "location": "Downtown, City Center",
+        "beds": 2,
+        "baths": 2,
+        "sqft": 1200,
+        "features": [
+            "Floor-to-ceiling windows",
+            "Quartz counters"
+        ]
+    },
+    {
+        "name": "Family Townhouse",
+        "description": "Three-bedroom townhouse with private patio and community park access.",
+        "price": 4500,
+        "type": "rent",
+        "typeofproperty": "townhouse",
+        "location": "Suburban Heights, CA",
+        "beds": 3,
+        "baths": 3,
+        "sqft": 1800,
+        "features": [
+            "Private patio",
+            "Attached garage"
+        ]
+    },
+    {
+        "name": "Luxury Penthouse",
+        "description": "Opulent penthouse with private elevator access and skyline terrace.",
+        "price": 8000,
+        "type": "rent",
+        "typeofproperty": "apartment",
+        "location": "Financial District, CA",
+        "beds": 3,
+        "baths": 3,
+        "sqft": 2200,
+        "features": [
+            "Private elevator",
+            "Terrace",
+            "Wine fridge"
+        ]
+    },
+    {
+        "name": "Garden Apartment",
+        "description": "Serene garden-level apartment with direct courtyard access.",
+        "price": 2200,
+        "type": "rent",
+        "typeofproperty": "apartment",
+        "location": "Park View, CA",
+        "beds": 2,
+        "baths": 1,
+        "sqft": 1100,
+        "features": [
+            "Courtyard access",
+            "Breakfast bar"
+        ]
+    },
+    {
+        "name": "Commercial Office Suite",
+        "description": "Flexible Class-A office suite with 12 private offices, reception, and kitchen.",
+        "price": 12000,
+        "type": "rent",
+        "typeofproperty": "commercial",
+        "location": "Midtown, CA",
+        "beds": 0,
+        "baths": 2,
+        "sqft": 5000,
+        "features": [
+            "Conference room",
+            "Server room",
+            "Reception"
+        ]
+    }
+]
+
+LISTINGS = SALE_LISTINGS + RENT_LISTINGS
@@ -0,0 +1,168 @@
+# search.py
+# Structured listing search straight off the ListingStore indexes: filters, free
+# text parsed into filters, sorting, pagination and facet counts. Backs the
+# /search endpoint and answers fully structured /chat messages without a model call.
+
+import heapq
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from itertools import islice
+
+from catalog.listing_store import DEFAULT_LIMIT, PROPERTY_TYPE_SYNONYMS, ListingStore, _normalize
+
+MAX_PAGE_SIZE = 100
+SORT_FIELDS = ("price", "beds", "baths", "sqft", "name")
+RANGE_INDEXED = ("price", "sqft")  # ListingStore keeps these presorted
+FACET_FIELDS = ("typeofproperty", "location", "beds")
+
+FILTER_FIELDS = (
+    "type", "typeofproperty", "location", "name", "beds", "min_beds", "baths", "min_baths",
+    "min_price", "max_price", "min_sqft", "max_sqft",
+)
+
+_RENT_RE = re.compile(r"\b(for rent|to rent|rent|rental|rentals|renting|lease|leasing|per month|monthly)\b|/mo\b", re.I)
+_SALE_RE = re.compile(r"\b(for sale|sale|buy|buying|purchase)\b", re.I)
+
+# Words that carry no intent beyond the filters parse_query understands. Words
+# that ask for an ordering or a judgement ("cheap", "budget") are deliberately
+# not here: the filters alone would drop that part of the request.
+FILLER_WORDS = frozenset("""
+    show me find list give get see any all some i i'm im we want wanna need looking look searching search for a an the
+    to in at near around with of and or please properties property homes home houses listings listing places place units
+    available options what which are is there do you have can could under below less than over above more between max min
+    minimum maximum up most least from sale rent rental rentals renting buy buying lease leasing purchase
+    price bed beds bedroom bedrooms bath baths bathroom bathrooms br bd ba sqft sq ft square feet sf
+    monthly month per mo k m million thousand usd dollars
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'-]*", re.I)
+_NUMERIC_RE = re.compile(r"\$?\s*\d[\d,.]*\s*(?:k|m|mm)?\b|\+", re.I)
+
+
+def listing_type(text: str) -> str | None:
+    """"sale" or "rent" when the text asks for exactly one of them."""
+    wants_rent, wants_sale = bool(_RENT_RE.search(text)), bool(_SALE_RE.search(text))
+    if wants_rent != wants_sale:
+        return "rent" if wants_rent else "sale"
+    return None
+
+
+@dataclass
+class SearchQuery:
+    q: str | None = None  # free text, parsed into filters; explicit filters win
+    type: str | None = None
+    typeofproperty: str | None = None
+    location: str | None = None
+    name: str | None = None
+    beds: int | None = None
+    min_beds: int | None = None
+    baths: int | None = None
+    min_baths: int | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    min_sqft: float | None = None
+    max_sqft: float | None = None
+    sort: str | None = None  # "price", "-price", "beds", "-sqft", ...
+    page: int = 1
+    page_size: int = DEFAULT_LIMIT
+    facets: bool = True
+
+
+def facet_counts(store: ListingStore, listing_ids, fields=FACET_FIELDS) -> dict[str, dict]:
+    """Count matches per value of each facet field, most common first."""
+    counts = {}
+    for field in fields:
+        column = getattr(store.columns, field)
+        counts[field] = dict(Counter(column[i] for i in listing_ids).most_common())
+    return counts
+
+
+def search_catalog(store: ListingStore, query: SearchQuery) -> dict:
+    """Run a structured search and return one JSON-ready page with totals and facets."""
+    if query.sort and query.sort.lstrip("-") not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)} (prefix '-' for descending)")
+    if query.page < 1 or not 1 <= query.page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    filters = store.parse_query(query.q) if query.q else {}
+    if query.q and listing_type(query.q):
+        filters["type"] = listing_type(query.q)
+    text_beds = "beds" in filters
+    filters.update({field: value for field, value in asdict(query).items() if field in FILTER_FIELDS and value is not None})
+    matches = store.search_ids(limit=None, **filters)
+    if not matches and text_beds and filters.get("beds") is not None and query.beds is None:
+        # "3 bed" in free text is often meant as "at least 3 beds", as in query_ids
+        filters["min_beds"] = filters.pop("beds")
+        matches = store.search_ids(limit=None, **filters)
+
+    start, end = (query.page - 1) * query.page_size, query.page * query.page_size
+    if query.sort:
+        field, descending = query.sort.lstrip("-"), query.sort.startswith("-")
+        index = getattr(store, field) if field in RANGE_INDEXED else None
+        if index is not None and len(matches) * 8 > len(store):
+            # Broad match: walk the presorted range index and stop at the end of the page
+            order = reversed(index.ids) if descending else index.ids
+            page_ids = list(islice(filter(set(matches).__contains__, order), start, end))
+        else:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            page_ids = pick(end, matches, key=getattr(store.columns, field).__getitem__)[start:end]
+    else:
+        page_ids = matches[start:end]
+
+    return {
+        "total": len(matches),
+        "page": query.page,
+        "page_size": query.page_size,
+        "pages": -(-len(matches) // query.page_size),
+        "filters": filters,
+        "sort": query.sort,
+        "results": store.columns.records(page_ids),
+        "facets": facet_counts(store, matches) if query.facets else None,
+    }
+
+
+def structured_query(store: ListingStore, message: str) -> SearchQuery | None:
+    """A SearchQuery for `message` if every word in it is accounted for by a filter, else None.
+
+    "3-bed townhouse for sale under $1.3M" or "rentals under $2500 in CA" qualify;
+    anything with words the parser does not understand ("near a good school") is
+    left to the agents. So is a price without "for sale" or "for rent": sale prices
+    and monthly rents share one column, so "under $1.3M" alone matches every rental.
+    """
+    filters = store.parse_query(message)
+    kind = listing_type(message)
+    if not filters and kind is None:
+        return None
+    if kind is None and ("min_price" in filters or "max_price" in filters):
+        return None
+
+    known = set(FILLER_WORDS)
+    for field in ("location", "name"):
+        if field in filters:
+            known.update(filters[field].split())
+    for word in _TOKEN_RE.findall(_NUMERIC_RE.sub(" ", message)):
+        word = _normalize(word).strip("'-")
+        singular = word[:-1] if word.endswith("s") else word
+        if word in known or singular in known:
+            continue
+        if word in PROPERTY_TYPE_SYNONYMS or singular in PROPERTY_TYPE_SYNONYMS or singular in store.by_property_type:
+            continue
+        return None
+
+    return SearchQuery(q=message, facets=False)
+
+
+def format_results(result: dict) -> str:
+    """Plain-text answer for /chat built from a search result page."""
+    total, results = result["total"], result["results"]
+    lines = [f"I found {total} matching propert{'y' if total == 1 else 'ies'}:"]
+    for listing in results:
+        price = f"${listing['price']:,}" + ("/mo" if listing["type"] == "rent" else "")
+        lines.append(
+            f"- {listing['name']} ({listing['typeofproperty']}, {listing['location']}): {price}, "
+            f"{listing['beds']} bd / {listing['baths']} ba, {listing['sqft']:,} sqft"
+        )
+    if total > len(results):
+        lines.append(f"Showing the first {len(results)}; add a price, location or bedroom filter to narrow it down.")
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+# agent_graph.py
+# Builds the agent graph: Gemini client and model, function tools, sub-agents,
+# orchestrator, synthesis agent and fan-out. Everything that pulls in the
+# openai/agents stack lives here and is imported on first use (or by the startup
+# warm-up), so importing main stays cheap.
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+# Names main exposes as module attributes once the graph is built
+GRAPH_ATTRS = frozenset({
+    "external_provider", "model", "run_config", "agent_hooks",
+    "sale_properties", "rent_properties", "web_about", "contact_info",
+    "sale_agent", "rent_agent", "web_agent", "contact_agent", "ai_chatbot_agent",
+    "sub_agents", "synthesis_agent", "fanout",
+})
+
+
+def build_agent_graph(listing_store, tool_meter, website_sections, tool_flight, upstream_settings, upstream_limiter) -> SimpleNamespace:
+    """Construct every agent; `listing_store()` returns the current catalog (it is swapped on refresh)."""
+    from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, RunConfig, function_tool
+
+    from dynamic.dynamic_Context import ai_chatbot_agent_instructions, sale_agent_instructions, rent_agent_instructions, website_agent_instructions, contact_agent_instructions, synthesis_agent_instructions
+    from rendering.tool_output import rank_sections, render_listings, section_index, select_sections
+    from routing.fanout import FanOut
+    from serving.agent_hooks import InstrumentationHooks
+    from serving.cache import depends_on
+    from serving.coalesce import coalesced_as_tool
+    from serving.instrumentation import span
+    from serving.upstream import build_http_client
+
+    # Gemini API setup
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set.")
+
+    external_provider = AsyncOpenAI(
+        api_key=gemini_api_key,
+        base_url=os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+        http_client=build_http_client(upstream_settings, upstream_limiter),
+        max_retries=0,  # retried with jittered backoff in serving/upstream.py
+    )
+
+    # Model configuration
+    model = OpenAIChatCompletionsModel(
+        model="gemini-2.5-flash",  # Corrected model name
+        openai_client=external_provider,
+    )
+
+    run_config = RunConfig(
+        model=model,
+        model_provider=external_provider,
+        tracing_disabled=True,
+    )
+
+    # Hybrid retrieval over the website sections for web_about (None without numpy: IDF scoring)
+    site_index = section_index(website_sections)
+
+    def find_listings(tool_name: str, query: str, listing_type: str, empty: str) -> str:
+        with span("tool", tool_name, query=query) as tool_span:
+            store = listing_store()
+            with store.reading():
+                ids = store.retrieve_ids(query, type=listing_type)
+                tool_span.attrs["matches"] = len(ids)
+                depends_on(*store.cache_tags(query, ids, type=listing_type))
+                rendered = render_listings(store.columns, ids, query)
+            return tool_meter.record(tool_name, rendered or empty)
+
+    # Function Tools (the listing tools rank against the text index, so they run in a worker thread)
+    @function_tool
+    async def sale_properties(query: str) -> str:
+        """Tool to get information about properties for sale. Understands type, location, beds, baths, price and sqft in the query, and ranks matches by how well they fit its wording."""
+        return await asyncio.to_thread(find_listings, "sale_properties", query, "sale", "No matching properties for sale.")
+
+    @function_tool
+    async def rent_properties(query: str) -> str:
+        """Tool to get information about properties for rent. Understands type, location, beds, baths, price and sqft in the query, and ranks matches by how well they fit its wording."""
+        return await asyncio.to_thread(find_listings, "rent_properties", query, "rent", "No matching properties for rent.")
+
+    @function_tool
+    def web_about(query: str) -> str:
+        """Tool to get information about the real estate website basesd on user qurerie."""
+        with span("tool", "web_about", query=query):
+            return tool_meter.record("web_about", select_sections(query, website_sections, ranked=rank_sections(site_index, query)))
+
+    @function_tool
+    def contact_info(query: str) -> str:
+        """Tool to get contact information and schedule meetings."""
+        with span("tool", "contact_info", query=query):
+            return tool_meter.record("contact_info", """
+    For assistance, contact us at:
+    - Email: support@yourrealestatewebsite.com
+    - Phone: +1-123-456-7890
+    Please mention the property name or type you're interested in, and we'll arrange a consultation at your preferred time.
+    """)
+
+    # Agent turn and model call spans, with token usage
+    agent_hooks = InstrumentationHooks()
+
+    # Sale Agent
+    sale_agent = Agent(
+        name="SaleAgent",
+        instructions=sale_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+        tools=[sale_properties],
+    )
+
+    # Rent Agent
+    rent_agent = Agent(
+        name="RentAgent",
+        instructions=rent_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+        tools=[rent_properties],
+    )
+
+    # Website Agent
+    web_agent = Agent(
+        name="WebsiteAgent",
+        instructions=website_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+        tools=[web_about],
+    )
+
+    # Contact Agent
+    contact_agent = Agent(
+        name="ContactAgent",
+        instructions= contact_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+        tools=[contact_info],
+    )
+
+    # Real Estate AI Chatbot Orchestrator Agent
+    ai_chatbot_agent = Agent(
+        name="RealEstateAIChatbotAgent",
+        instructions=ai_chatbot_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+        tools=[
+            coalesced_as_tool(
+                sale_agent,
+                tool_flight,
+                tool_name="SaleAgent",
+                tool_description="Tool to provide information about properties for sale based on user queries. Your task is to get the information of sale properties accordingly to the user need.",
+            ),
+            coalesced_as_tool(
+                rent_agent,
+                tool_flight,
+                tool_name="RentAgent",
+                tool_description="Tool to provide information about properties for rent based on user queries. Your task is to get the information of rent properties accordingly to the user need.",
+            ),
+            coalesced_as_tool(
+                web_agent,
+                tool_flight,
+                tool_name="WebsiteAgent",
+                tool_description="Tool to provide information about the website based on user queries. Your task is to get the information of website accordingly to the user need.",
+            ),
+            coalesced_as_tool(
+                contact_agent,
+                tool_flight,
+                tool_name="ContactAgent",
+                tool_description="Tool to handle contact information and meeting scheduling for users interested in properties.",
+            ),
+        ],
+    )
+
+    sub_agents = {
+        "SaleAgent": sale_agent,
+        "RentAgent": rent_agent,
+        "WebsiteAgent": web_agent,
+        "ContactAgent": contact_agent,
+    }
+
+    # Merges the answers of sub-agents run in parallel for multi-intent messages
+    synthesis_agent = Agent(
+        name="RealEstateSynthesisAgent",
+        instructions=synthesis_agent_instructions,
+        model=model,
+        hooks=agent_hooks,
+    )
+
+    # Multi-intent messages fan out to their sub-agents concurrently (FANOUT_BRANCH_TIMEOUT seconds per branch)
+    fanout = FanOut(
+        sub_agents,
+        synthesis_agent,
+        flight=tool_flight,
+        branch_timeout=float(os.getenv("FANOUT_BRANCH_TIMEOUT", "20")),
+        enabled=os.getenv("FANOUT_ENABLED", "true").lower() in ("1", "true", "yes"),
+    )
+
+    return SimpleNamespace(**{name: value for name, value in locals().items() if name in GRAPH_ATTRS})
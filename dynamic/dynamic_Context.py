@@ -63,4 +63,11 @@ def contact_agent_instructions(Wrapper: RunContextWrapper, BaseModel):
     return """You are a Contact Agent for a real estate website.
     Your role is to provide contact details and assist users in scheduling meetings based on user queries.
     Provide clear and concise contact information including email addresses, phone numbers, and office hours.
-    Assist users in scheduling meetings by providing available time slots and instructions on how to book an appointment."""
\ No newline at end of file
+    Assist users in scheduling meetings by providing available time slots and instructions on how to book an appointment."""
+
+# Synthesis Agent Context
+def synthesis_agent_instructions(Wrapper: RunContextWrapper, BaseModel):
+    return """You are the Real Estate AI Chatbot merging answers from several specialist agents.
+    You receive the user's request followed by one section per agent ([SaleAgent], [RentAgent], [WebsiteAgent], [ContactAgent]).
+    Write one well structured, concise reply that answers every part of the request using only the information in those sections.
+    If a section is marked unavailable, say briefly that this part could not be answered right now and answer the rest."""
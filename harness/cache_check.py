@@ -0,0 +1,74 @@
+# cache_check.py
+# Exercises the /chat response cache on the shared (Redis) backend with the
+# in-memory fake client: two caches on one client stand in for two workers.
+# Prints each check and exits non-zero if any fails.
+#
+#   python -m harness.cache_check
+
+import json
+import sys
+
+from serving.cache import RedisBackend, ResponseCache, collect_dependencies, depends_on
+from serving.shared import InMemoryClient
+
+
+def run() -> dict:
+    client = InMemoryClient()
+    worker_a = ResponseCache(RedisBackend(client), similarity_threshold=0.9)
+    worker_b = ResponseCache(RedisBackend(client), similarity_threshold=0.9)
+    checks = {}
+
+    worker_a.set("Show villas for sale", "villas", tag="SaleAgent", dependencies={"listing:Luxury Villa"})
+    checks["hit_from_other_worker"] = worker_b.get("show villas for sale!") == "villas"
+
+    worker_a.set("Any condos for rent?", "condos", tag="RentAgent")
+    worker_b.invalidate(["RentAgent"])
+    checks["tag_invalidation_is_shared"] = worker_a.get("any condos for rent") is None
+    checks["other_tags_kept"] = worker_a.get("show villas for sale") == "villas"
+
+    worker_b.invalidate_dependencies({"listing:Luxury Villa"})
+    checks["dependency_invalidation_is_shared"] = worker_a.get("show villas for sale") is None
+
+    worker_a.set("townhouses for sale under 500000", "townhouses", tag="SaleAgent")
+    checks["similar_hit"] = worker_a.get("townhouses for sale under 500000 ok") == "townhouses"
+    checks["number_mismatch_misses"] = worker_a.get("townhouses for sale under 600000") is None
+    checks["negation_misses"] = worker_a.get("townhouses not for sale under 500000") is None
+
+    # Invalidations that land while an answer is being built (after the tool read, before set)
+    dependencies = collect_dependencies(worker_a.dependencies())
+    depends_on("listing:Harbor Condo")
+    worker_b.invalidate_dependencies({"listing:Harbor Condo"})
+    worker_a.set("show harbor condos", "condos", tag="SaleAgent", dependencies=dependencies)
+    checks["dependency_invalidated_mid_answer_misses"] = worker_a.get("show harbor condos") is None
+
+    dependencies = collect_dependencies(worker_a.dependencies())
+    worker_b.invalidate(["SaleAgent"])
+    worker_a.set("show lakeside villas", "villas", tag="SaleAgent", dependencies=dependencies)
+    checks["tag_invalidated_mid_answer_misses"] = worker_a.get("show lakeside villas") is None
+
+    dependencies = collect_dependencies(worker_a.dependencies())
+    worker_b.invalidate()
+    worker_a.set("office hours", "9 to 5", tag="ContactAgent", dependencies=dependencies)
+    checks["global_invalidated_mid_answer_misses"] = worker_a.get("office hours") is None
+
+    dependencies = collect_dependencies(worker_a.dependencies())
+    depends_on("listing:Harbor Condo")
+    worker_a.set("show harbor condos", "condos", tag="SaleAgent", dependencies=dependencies)
+    checks["collected_answer_hits"] = worker_b.get("show harbor condos") == "condos"
+    collect_dependencies(None)
+
+    worker_a.set("phone number", "555-0100", tag="ContactAgent")
+    worker_b.invalidate()
+    checks["global_invalidation_is_shared"] = worker_a.get("phone number") is None
+    return checks
+
+
+def main():
+    checks = run()
+    print(json.dumps(checks, indent=2))
+    if not all(checks.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# catalog_check.py
+# Feeds catalog edits with malformed rows through the reload path (CatalogSync.diff,
+# ListingStore.apply, CatalogSync.commit) and checks that bad rows are reported and
+# skipped, that a listing whose edit is bad keeps its last good version, that a
+# failed apply leaves the store and the sync baseline as they were, and that the
+# text index follows an apply. Prints each check and exits non-zero if any fails.
+#
+#   python -m harness.catalog_check
+
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.columnar import ListingColumns
+from catalog.external import CatalogSync, write_catalog
+from catalog.listing_store import ListingStore
+
+
+def _consistent(store: ListingStore) -> bool:
+    """Every column has one entry per row and every live catalog id maps to a row that is not dead."""
+    columns = store.columns
+    lengths = {len(getattr(columns, name)) for name in (
+        "external_id", "name", "description", "type", "typeofproperty", "location", "features",
+        "price", "beds", "baths", "sqft", "_rendered",
+    )}
+    return len(lengths) == 1 and all(row not in store.dead and columns.external_id[row] == key for key, row in store.rows.items())
+
+
+def _snapshot(store: ListingStore) -> tuple:
+    return dict(store.rows), set(store.dead), len(store.columns), store.search_ids(limit=None, type="sale")
+
+
+def run(directory: str) -> dict:
+    listings = synthetic_listings(200)
+    for i, listing in enumerate(listings):
+        listing["id"] = f"L{i}"
+    path = os.path.join(directory, "listings.jsonl")
+    write_catalog(path, listings)
+
+    sync = CatalogSync(path)
+    store = ListingStore(ListingColumns(sync.load(), checked=True))
+    checks = {}
+
+    # One good update, one good addition and three bad rows: a bad edit of L2, a bad new row, broken JSON
+    lines = open(path).read().splitlines()
+    lines[1] = json.dumps({**listings[1], "price": listings[1]["price"] + 1})
+    lines[2] = json.dumps({**listings[2], "price": "call us"})
+    lines[3] = lines[3][:40]
+    lines.append(json.dumps({**listings[4], "id": "N1", "beds": None}))
+    lines.append(json.dumps({**listings[5], "id": "N2"}))
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    diff = sync.diff()
+    checks["good_rows_diffed"] = set(diff.upserts) == {"L1", "N2"}
+    checks["bad_rows_reported"] = len(diff.rejected) == 3 and {row.listing_id for row in diff.rejected} == {"L2", "N1", None}
+    # L3's line is unreadable, so it is gone; L2's row is readable but bad, so it stays as it was
+    checks["bad_edit_keeps_listing"] = diff.deleted == {"L3"}
+
+    # A failed apply: nothing is committed, so the next diff finds the same changes
+    again = sync.diff()
+    checks["uncommitted_diff_found_again"] = set(again.upserts) == set(diff.upserts) and again.deleted == diff.deleted
+
+    before = _snapshot(store)
+    try:
+        store.apply({**diff.upserts, "N3": {**listings[6], "sqft": -1}}, diff.deleted)
+        checks["bad_apply_raises"] = False
+    except ValueError:
+        checks["bad_apply_raises"] = True
+    # Listings are checked before anything is touched
+    checks["bad_apply_leaves_store"] = _snapshot(store) == before
+    checks["bad_apply_consistent"] = _consistent(store)
+
+    # With the text index built, the new rows are embedded before the swap and searchable after it
+    text_index = store.text_index
+    changes = store.apply(again.upserts, again.deleted)
+    sync.commit(again)
+    checks["apply_after_failure"] = set(changes.added) == {"N2"} and changes.updated == ["L1"] and changes.deleted == ["L3"]
+    checks["store_consistent"] = _consistent(store)
+    if text_index is not None:
+        checks["text_index_follows_apply"] = (store.rows["N2"] in text_index and store.rows["L1"] in text_index
+                                              and len(text_index) == len(store))
+    checks["l2_kept"] = store.columns.price[store.rows["L2"]] == listings[2]["price"]
+    checks["sync_reports_rejected"] = len(sync.rejected) == 3 and sync.last_diff["rejected"] == 3
+    checks["committed_diff_is_baseline"] = not sync.diff()
+
+    columns = store.columns
+    rows = len(columns)
+    try:
+        columns.append({**listings[7], "baths": "two"})
+        checks["append_rejects"] = False
+    except ValueError:
+        checks["append_rejects"] = len(columns) == rows and _consistent(store)
+    return checks
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="catalog_check_") as directory:
+        checks = run(directory)
+    print(json.dumps(checks, indent=2))
+    if not all(checks.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# fake_model.py
+# Deterministic local stand-in for the Gemini model so the agent graph can run
+# (streamed or not) without an API key or network access.
+
+import asyncio
+import itertools
+import json
+import re
+
+from agents import ModelResponse, Usage
+from agents.models.interface import Model
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+_TOKEN_RE = re.compile(r"\S+\s*")
+_ids = itertools.count(1)
+
+
+def _user_text(input) -> str:
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, str):
+                return content
+            return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _tool_output(input) -> str | None:
+    """Output of the last tool call, if the model is being called back after one."""
+    if isinstance(input, str) or not input:
+        return None
+    last = input[-1]
+    if isinstance(last, dict) and last.get("type") == "function_call_output":
+        return str(last.get("output", ""))
+    return None
+
+
+def pick_tool(text: str, tools: list):
+    """Default tool choice: the tool whose name appears in the message, else the first one."""
+    lowered = text.lower()
+    for tool in tools:
+        stem = tool.name.lower().replace("agent", "").replace("_properties", "").replace("web_about", "website")
+        stem = stem.replace("contact_info", "contact")
+        if stem and stem in lowered:
+            return tool
+    return tools[0] if tools else None
+
+
+class FakeModel(Model):
+    """Scripted model: calls one tool when it has tools, then answers with `reply`.
+
+    `reply` may be a string or a callable `(user_text, tool_output) -> str`. `latency`
+    is paid once per call and `token_latency` once per streamed token, which lets
+    benchmarks dial in realistic upstream timings.
+    """
+
+    def __init__(self, reply=None, latency: float = 0.0, token_latency: float = 0.0, use_tools: bool = True, choose_tool=pick_tool, name: str = "fake"):
+        self.reply = reply
+        self.latency = latency
+        self.token_latency = token_latency
+        self.use_tools = use_tools
+        self.choose_tool = choose_tool
+        self.name = name
+        self.calls = 0
+        self.streamed_tokens = 0
+
+    def _reply_text(self, text: str, tool_output: str | None) -> str:
+        if callable(self.reply):
+            return self.reply(text, tool_output)
+        if self.reply is not None:
+            return self.reply
+        if tool_output is not None:
+            return f"Here is what I found: {tool_output[:200]}"
+        return f"You asked: {text}"
+
+    def _plan(self, input, tools) -> list:
+        text = _user_text(input)
+        tool_output = _tool_output(input)
+        tool = self.choose_tool(text, tools) if self.use_tools and tools and tool_output is None else None
+        if tool is not None:
+            properties = list(tool.params_json_schema.get("properties", {})) or ["input"]
+            call_id = f"call_{next(_ids)}"
+            return [ResponseFunctionToolCall(
+                id=call_id,
+                call_id=call_id,
+                name=tool.name,
+                arguments=json.dumps({properties[0]: text}),
+                type="function_call",
+                status="completed",
+            )]
+        return [ResponseOutputMessage(
+            id=f"msg_{next(_ids)}",
+            content=[ResponseOutputText(annotations=[], text=self._reply_text(text, tool_output), type="output_text")],
+            role="assistant",
+            status="completed",
+            type="message",
+        )]
+
+    def _usage(self, input, output) -> ResponseUsage:
+        input_tokens = len(str(input)) // 4
+        output_tokens = sum(len(str(item.model_dump())) for item in output) // 4
+        return ResponseUsage(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+            input_tokens_details=InputTokensDetails(cached_tokens=0),
+            output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        )
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None, prompt=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output = self._plan(input, tools)
+        usage = self._usage(input, output)
+        return ModelResponse(
+            output=output,
+            usage=Usage(requests=1, input_tokens=usage.input_tokens, output_tokens=usage.output_tokens, total_tokens=usage.total_tokens),
+            response_id=None,
+        )
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None, prompt=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output = self._plan(input, tools)
+        sequence = itertools.count()
+        for index, item in enumerate(output):
+            if isinstance(item, ResponseOutputMessage):
+                for token in _TOKEN_RE.findall(item.content[0].text):
+                    if self.token_latency:
+                        await asyncio.sleep(self.token_latency)
+                    self.streamed_tokens += 1
+                    yield ResponseTextDeltaEvent(
+                        content_index=0,
+                        delta=token,
+                        item_id=item.id,
+                        logprobs=[],
+                        output_index=index,
+                        sequence_number=next(sequence),
+                        type="response.output_text.delta",
+                    )
+        # Only output/usage/id are read from the final response, so skip the full validation
+        response = Response.model_construct(id=f"resp_{next(_ids)}", output=output, usage=self._usage(input, output), object="response", model=self.name)
+        yield ResponseCompletedEvent(response=response, sequence_number=next(sequence), type="response.completed")
+
+
+def _agents(app_module) -> list:
+    agents = [app_module.ai_chatbot_agent, *app_module.sub_agents.values()]
+    if hasattr(app_module, "synthesis_agent"):
+        agents.append(app_module.synthesis_agent)
+    return agents
+
+
+def install_fake_model(app_module, model: Model | None = None) -> Model:
+    """Point every agent in `main` (and its run_config) at a fake model."""
+    model = model or FakeModel()
+    app_module.run_config.model = model
+    for agent in _agents(app_module):
+        agent.model = model
+    return model
+
+
+def install_fake_models(app_module, **model_kwargs) -> dict[str, FakeModel]:
+    """Give every agent its own FakeModel so calls can be counted per agent.
+
+    Clears run_config.model, which would otherwise override the orchestrator's model.
+    """
+    app_module.run_config.model = None
+    models = {}
+    for agent in _agents(app_module):
+        agent.model = models[agent.name] = FakeModel(name=agent.name, **model_kwargs)
+    return models
@@ -0,0 +1,50 @@
+# retrieval_check.py
+# Checks that ranked retrieval (ListingStore.retrieve_ids) only reorders the
+# structured matches: whenever they fit in the limit, it returns exactly the
+# listings query_ids returns. Runs on the built-in catalog and a synthetic one;
+# prints each case and exits non-zero if any fails.
+#
+#   python -m harness.retrieval_check
+
+import json
+import sys
+
+from benchmarks.synthetic import synthetic_listings
+from catalog.listing_store import DEFAULT_LIMIT, ListingStore
+from catalog.listings import LISTINGS
+
+CASES = [
+    ("Show me all properties for sale", {"type": "sale"}),
+    ("all rentals", {"type": "sale"}),
+    ("property with 2 baths", {}),
+    ("something cozy near the water with a fireplace", {}),
+    ("condo with a gym", {"type": "rent"}),
+    ("3-bed townhouse under $1.3M", {}),
+    ("villas", {"type": "sale"}),
+    ("anything", {"type": "rent"}),
+]
+
+
+def check(store: ListingStore, name: str) -> list[dict]:
+    rows = []
+    for query, filters in CASES:
+        matches = store.query_ids(query, limit=None, **filters)
+        retrieved = store.retrieve_ids(query, **filters)
+        if len(matches) <= DEFAULT_LIMIT:
+            ok = set(retrieved) == set(matches)
+        else:
+            ok = len(retrieved) == DEFAULT_LIMIT and set(retrieved) <= set(matches)
+        rows.append({"catalog": name, "query": query, "filters": filters, "matches": len(matches),
+                     "retrieved": len(retrieved), "ok": ok})
+    return rows
+
+
+def main():
+    rows = check(ListingStore(LISTINGS), "built-in") + check(ListingStore(synthetic_listings(5000)), "synthetic")
+    print(json.dumps(rows, indent=2))
+    if not all(row["ok"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# stream_check.py
+# Drives /chat/stream against the fake model and prints the event stream, then
+# checks that a client disconnect cancels the in-flight run.
+#
+#   python -m harness.stream_check
+
+import asyncio
+import json
+import os
+import socket
+
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import httpx
+import uvicorn
+
+import main
+from harness.fake_model import FakeModel, install_fake_model
+
+
+async def print_stream(client: httpx.AsyncClient, message: str, format: str):
+    print(f"\n>>> {message!r} ({format})")
+    async with client.stream("POST", f"/chat/stream?format={format}", json={"message": message}) as response:
+        async for line in response.aiter_lines():
+            if line:
+                print(line)
+
+
+async def check_disconnect(model: FakeModel):
+    # ASGITransport buffers the whole body, so a real server is needed to see the disconnect
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            async with client.stream("POST", "/chat/stream?format=ndjson", json={"message": "tell me something long"}) as response:
+                async for line in response.aiter_lines():
+                    if json.loads(line)["type"] == "token":
+                        break  # leave after the first token
+        await asyncio.sleep(0.5)
+    finally:
+        server.should_exit = True
+        await serving
+    print(f"\ntokens generated after disconnect: {model.streamed_tokens} of 500 (cancelled: {model.streamed_tokens < 500})")
+
+
+async def run():
+    model = install_fake_model(main, FakeModel(token_latency=0.01))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await print_stream(client, "Any condos for rent under 3500?", "ndjson")
+        await print_stream(client, "What is this website about?", "sse")
+        await print_stream(client, "Any condos for rent under 3500?", "ndjson")  # served from cache
+        # Multi-intent: one progress event per branch as it starts and finishes, before the synthesis tokens
+        await print_stream(client, "Show me condos for sale and rentals under 3000, and what's your phone number?", "ndjson")
+
+    await check_disconnect(install_fake_model(main, FakeModel(reply="word " * 500, token_latency=0.01, use_tools=False)))
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+# stub_openai.py
+# Minimal OpenAI-compatible chat completions server for exercising the upstream
+# client locally: fixed latency, and an optional share of 429/503 responses.
+#
+#   python -m harness.stub_openai --port 8765 --latency 0.2 --error-rate 0.1
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.1, error_rate: float = 0.0, reply: str = "Stub reply.", seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    ids = itertools.count(1)
+    app.state.requests = 0
+    app.state.concurrent = 0
+    app.state.max_concurrent = 0
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        app.state.concurrent += 1
+        app.state.max_concurrent = max(app.state.max_concurrent, app.state.concurrent)
+        try:
+            await asyncio.sleep(latency)
+            if rng.random() < error_rate:
+                status = rng.choice((429, 503))
+                return JSONResponse({"error": {"message": "stub error", "code": status}}, status_code=status, headers={"retry-after": "0.05"})
+            return {
+                "id": f"chatcmpl-{next(ids)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+            }
+        finally:
+            app.state.concurrent -= 1
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "max_concurrent": app.state.max_concurrent}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.error_rate), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# upstream_check.py
+# Fires a burst of completions through the limited upstream client at the stub
+# server and prints limiter stats next to what the server saw.
+#
+#   python -m harness.upstream_check --requests 50 --max-in-flight 4 --error-rate 0.2
+
+import argparse
+import asyncio
+import json
+import socket
+
+import httpx
+import uvicorn
+from openai import AsyncOpenAI
+
+from harness.stub_openai import create_app
+from serving.upstream import UpstreamLimiter, UpstreamSettings, build_http_client
+
+
+async def run(requests: int, max_in_flight: int, error_rate: float, latency: float):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(latency, error_rate), port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    settings = UpstreamSettings(max_in_flight=max_in_flight, backoff_base=0.05)
+    limiter = UpstreamLimiter(settings.max_in_flight)
+    client = AsyncOpenAI(api_key="stub", base_url=f"http://127.0.0.1:{port}", http_client=build_http_client(settings, limiter), max_retries=0)
+    try:
+        results = await asyncio.gather(
+            *(client.chat.completions.create(model="stub", messages=[{"role": "user", "content": f"hi {i}"}]) for i in range(requests)),
+            return_exceptions=True,
+        )
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as plain:
+            server_stats = (await plain.get("/stats")).json()
+    finally:
+        await client.close()
+        server.should_exit = True
+        await serving
+
+    print(json.dumps({
+        "succeeded": sum(not isinstance(result, Exception) for result in results),
+        "failed": sum(isinstance(result, Exception) for result in results),
+        "limiter": limiter.snapshot(),
+        "server": server_stats,
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.max_in_flight, args.error_rate, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# tool_output.py
+# Sits between the function tools and the model: renders the smallest output
+# that still answers the query within a token budget, and meters tokens per tool.
+
+import math
+import re
+from dataclasses import dataclass
+
+from serving.sessions import estimate_tokens
+
+LISTING_TOKEN_BUDGET = 400
+WEBSITE_TOKEN_BUDGET = 350
+MIN_SECTION_SCORE = 1.5
+# Website sections share most of their vocabulary, so vector hits need a higher cosine than listings
+SECTION_MIN_SIMILARITY = 0.45
+
+DEFAULT_FIELDS = ("name", "typeofproperty", "location", "price", "beds", "baths", "sqft")
+
+# Query words that ask for a column beyond the defaults
+FIELD_KEYWORDS = {
+    "features": ("feature", "amenit", "garage", "pool", "balcony", "fireplace", "kitchen", "parking"),
+    "description": ("describe", "description", "detail", "tell me about", "more about", "what is it like"),
+}
+
+DETAIL_KEYWORDS = ("detail", "tell me about", "more about", "everything about", "full info", "complete information")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or our the this to what which with you your".split()
+)
+
+
+class ToolTokenMeter:
+    """Instrumentation hook: counts output tokens per tool and notifies listeners."""
+
+    def __init__(self):
+        self.tools: dict[str, dict] = {}
+        self.listeners = []
+
+    def record(self, tool_name: str, text: str) -> str:
+        tokens = estimate_tokens(text)
+        stats = self.tools.setdefault(tool_name, {"calls": 0, "tokens": 0, "max_tokens": 0})
+        stats["calls"] += 1
+        stats["tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+        for listener in self.listeners:
+            listener(tool_name, tokens)
+        return text
+
+    def snapshot(self) -> dict:
+        return {
+            name: {**stats, "avg_tokens": stats["tokens"] / stats["calls"]}
+            for name, stats in self.tools.items()
+        }
+
+
+# ---------------------------------------------------------------- listings
+
+def requested_fields(query: str) -> tuple[str, ...]:
+    lowered = (query or "").lower()
+    fields = list(DEFAULT_FIELDS)
+    for field, keywords in FIELD_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            fields.append(field)
+    return tuple(fields)
+
+
+def _cell(columns, listing_id: int, field: str) -> str:
+    value = getattr(columns, field)[listing_id]
+    if field == "price":
+        return f"${value:,}" + ("/mo" if columns.type[listing_id] == "rent" else "")
+    if field == "features":
+        return ", ".join(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def render_listings(columns, listing_ids: list[int], query: str = "", token_budget: int = LISTING_TOKEN_BUDGET) -> str:
+    """Full cached lines for a single listing or a detail request, otherwise a terse table of the requested fields.
+
+    No matches render as "" so the tools can say so in their own words.
+    """
+    if not listing_ids:
+        return ""
+    lowered = (query or "").lower()
+    if len(listing_ids) == 1 or any(keyword in lowered for keyword in DETAIL_KEYWORDS):
+        lines = [columns.rendered(i) for i in listing_ids]
+    else:
+        fields = requested_fields(query)
+        lines = ["|".join(fields)]
+        # Cells straight from the columns: no per-row dict is materialized
+        lines.extend("|".join(_cell(columns, i, field) for field in fields) for i in listing_ids)
+
+    out, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if out and used + cost > token_budget:
+            break
+        out.append(line)
+        used += cost
+    # The table header is not a listing
+    shown = len(out) - (len(lines) - len(listing_ids))
+    if shown < len(listing_ids):
+        out.append(f"(+{len(listing_ids) - shown} more matches; ask to narrow down)")
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------- documents
+
+@dataclass
+class Section:
+    title: str
+    text: str
+    terms: frozenset
+    group: str = "Overview"  # heading the section sits under
+    intro: bool = False  # the paragraph introducing its group rather than a "Title: body" item
+
+
+def _terms(text: str) -> frozenset:
+    return frozenset(word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS)
+
+
+def chunk_document(text: str) -> list[Section]:
+    """Split a plain-text document into sections: one per 'Title: body' line or paragraph under a heading."""
+    sections: list[Section] = []
+    heading = "Overview"
+    for raw in text.strip().splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        # Short lines without punctuation are headings ("Services Offered")
+        if len(line) < 60 and not line.endswith((".", ":")) and ":" not in line:
+            heading = line
+            continue
+        title, _, body = line.partition(": ")
+        intro = not body or len(title) > 60
+        if intro:
+            title, body = heading, line
+        else:
+            title = f"{heading} / {title}" if heading != "Overview" else title
+        sections.append(Section(title=title, text=line, terms=_terms(f"{title} {body}"), group=heading, intro=intro))
+    return sections
+
+
+def select_sections(query: str, sections: list[Section], token_budget: int = WEBSITE_TOKEN_BUDGET, min_score: float = MIN_SECTION_SCORE, ranked: list[int] | None = None) -> str:
+    """Return the sections most relevant to `query`, in document order, within the budget.
+
+    Sections are scored by the summed IDF of the query terms they contain, so words
+    found everywhere ("website") count for little, unless `ranked` (section indexes,
+    best first, e.g. from the hybrid index) is given; if nothing specific matches
+    the overview paragraph is returned.
+    """
+    if ranked is None:
+        query_terms = _terms(query or "")
+        document_frequency: dict[str, int] = {}
+        for section in sections:
+            for term in query_terms & section.terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        idf = {term: math.log(len(sections) / count) for term, count in document_frequency.items()}
+        scored = sorted(
+            ((sum(idf[term] for term in query_terms & section.terms), index) for index, section in enumerate(sections)),
+            reverse=True,
+        )
+        ranked = [index for score, index in scored if score >= min_score]
+    chosen, used = [], 0
+    for index in ranked:
+        cost = estimate_tokens(sections[index].text)
+        if chosen and used + cost > token_budget:
+            continue
+        chosen.append(index)
+        used += cost
+    if not chosen and sections:
+        chosen = [0]
+    # A matching intro paragraph ("built using a modern tech stack:") stands for the items under it
+    for index in list(chosen):
+        if not sections[index].intro:
+            continue
+        for sibling in range(index + 1, len(sections)):
+            section = sections[sibling]
+            if section.group != sections[index].group or section.intro:
+                break
+            cost = estimate_tokens(section.text)
+            if sibling in chosen or used + cost > token_budget:
+                continue
+            chosen.append(sibling)
+            used += cost
+    return "\n".join(sections[index].text for index in sorted(chosen))
+
+
+def section_index(sections: list[Section]):
+    """Hybrid BM25 + vector index over the sections, keyed by position; None without numpy."""
+    try:
+        from retrieval.hybrid import HybridIndex
+    except ImportError:
+        return None
+    index = HybridIndex()
+    index.add_many((position, f"{section.title} {section.text}") for position, section in enumerate(sections))
+    return index
+
+
+def rank_sections(index, query: str, min_score: float = MIN_SECTION_SCORE) -> list[int] | None:
+    """Section positions for `select_sections(ranked=...)`, or None to fall back to IDF scoring.
+
+    Vector hits are fused in only when some section matches the query words
+    specifically; generic questions ("what is this website about") keep the overview.
+    """
+    if index is None:
+        return None
+    from retrieval.text import tokenize
+
+    _, scores = index.lexical.scores(tokenize(query))
+    if not len(scores) or scores.max() < min_score:
+        return None
+    return [position for position, _ in index.search(query, k=len(index), min_lexical=min_score, min_similarity=SECTION_MIN_SIMILARITY)]
@@ -0,0 +1,163 @@
+# dense.py
+# Locally computed embeddings and a NumPy vector index. Texts are embedded with
+# the hashing trick over words, word bigrams and character trigrams (signed,
+# crc32-hashed so vectors are stable across processes), then L2-normalized, so a
+# dot product is a cosine similarity. Like the lexical index, vectors loaded from
+# disk stay memory-mapped and new ones go to an in-memory growable block.
+
+import zlib
+from array import array
+
+import numpy as np
+
+DIM = 128
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.7
+MAX_CACHED_FEATURES = 200_000
+
+
+class HashedEmbedder:
+    """Deterministic text -> unit vector mapping; no model, no external service.
+
+    Each distinct word gets an id whose hashed features (the word and its
+    trigrams) are stored once in flat arrays, so embedding a batch is a few
+    dictionary lookups per token plus one vectorized bincount.
+    """
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self._reset()
+
+    def _reset(self):
+        self._word_ids: dict[str, int] = {}
+        self._bigrams: dict[str, tuple[int, float]] = {}
+        self._offsets = array("q", [0])  # word id -> start of its features
+        self._feature_index = array("q")
+        self._feature_weight = array("f")
+
+    def _hashed(self, feature: str, weight: float) -> tuple[int, float]:
+        h = zlib.crc32(feature.encode())
+        return h % self.dim, weight if h & 0x80000000 else -weight
+
+    def _word_id(self, word: str) -> int:
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            features = [self._hashed(word, WORD_WEIGHT)]
+            padded = f"#{word}#"
+            grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            features.extend(self._hashed("3:" + gram, TRIGRAM_WEIGHT / len(grams) ** 0.5) for gram in grams)
+            for index, weight in features:
+                self._feature_index.append(index)
+                self._feature_weight.append(weight)
+            self._offsets.append(len(self._feature_index))
+            word_id = self._word_ids[word] = len(self._word_ids)
+        return word_id
+
+    def _bigram(self, left: str, right: str) -> tuple[int, float]:
+        feature = f"{left} {right}"
+        cached = self._bigrams.get(feature)
+        if cached is None:
+            cached = self._bigrams[feature] = self._hashed("2:" + feature, BIGRAM_WEIGHT)
+        return cached
+
+    def embed_tokens(self, tokens: list[str]) -> np.ndarray:
+        return self.embed_many([tokens])[0]
+
+    def embed_many(self, token_lists: list[list[str]]) -> np.ndarray:
+        """One unit row per token list."""
+        if len(self._word_ids) + len(self._bigrams) >= MAX_CACHED_FEATURES:
+            self._reset()
+        rows, dim = len(token_lists), self.dim
+        word_rows, word_ids = array("q"), array("q")
+        bigram_slots, bigram_weights = array("q"), array("f")
+        for row, tokens in enumerate(token_lists):
+            word_ids.extend([self._word_id(word) for word in tokens])
+            word_rows.extend([row] * len(tokens))
+            offset = row * dim
+            for left, right in zip(tokens, tokens[1:]):
+                index, weight = self._bigram(left, right)
+                bigram_slots.append(offset + index)
+                bigram_weights.append(weight)
+
+        # Expand every token into its features: positions offsets[id] .. offsets[id + 1]
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        ids = np.frombuffer(word_ids, dtype=np.int64)
+        starts = offsets[ids]
+        counts = offsets[ids + 1] - starts
+        total = int(counts.sum())
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        feature_rows = np.repeat(np.frombuffer(word_rows, dtype=np.int64), counts)
+        slots = np.concatenate((feature_rows * dim + np.frombuffer(self._feature_index, dtype=np.int64)[positions],
+                                np.frombuffer(bigram_slots, dtype=np.int64)))
+        weights = np.concatenate((np.frombuffer(self._feature_weight, dtype=np.float32)[positions],
+                                  np.frombuffer(bigram_weights, dtype=np.float32)))
+        vectors = np.bincount(slots, weights=weights, minlength=rows * dim).astype(np.float32).reshape(rows, dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+class DenseIndex:
+    """Row per slot; `similarities(vector)` is one matrix-vector product."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self._base: np.ndarray | None = None  # memory-mapped rows from the last save
+        self._delta = np.empty((0, dim), dtype=np.float32)
+        self._delta_rows = 0
+
+    def __len__(self) -> int:
+        return (0 if self._base is None else len(self._base)) + self._delta_rows
+
+    def reserve(self, rows: int):
+        """Make room for `rows` more vectors without repeated regrowth."""
+        needed = self._delta_rows + rows
+        if needed > len(self._delta):
+            grown = np.empty((max(needed, 2 * len(self._delta), 64), self.dim), dtype=np.float32)
+            grown[:self._delta_rows] = self._delta[:self._delta_rows]
+            self._delta = grown
+
+    def add(self, slot: int, vector: np.ndarray):
+        self.add_many(slot, vector[None, :])
+
+    def add_many(self, first_slot: int, vectors: np.ndarray):
+        """Append rows for slots `first_slot`, `first_slot` + 1, ..."""
+        if first_slot != len(self):
+            raise ValueError("slots must be added in order")
+        self.reserve(len(vectors))
+        self._delta[self._delta_rows:self._delta_rows + len(vectors)] = vectors
+        self._delta_rows += len(vectors)
+
+    def similarities(self, vector: np.ndarray, slots: np.ndarray | None = None) -> np.ndarray:
+        """Cosine of `vector` with every row, or only with the rows in `slots`."""
+        base_rows = 0 if self._base is None else len(self._base)
+        if slots is not None:
+            in_base = slots < base_rows
+            out = np.empty(len(slots), dtype=np.float32)
+            if base_rows:
+                out[in_base] = self._base[slots[in_base]] @ vector
+            out[~in_base] = self._delta[slots[~in_base] - base_rows] @ vector
+            return out
+        parts = []
+        if base_rows:
+            parts.append(self._base @ vector)
+        if self._delta_rows:
+            parts.append(self._delta[:self._delta_rows] @ vector)
+        if not parts:
+            return np.empty(0, np.float32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def compacted(self, keep: np.ndarray) -> np.ndarray:
+        rows = []
+        base_rows = 0 if self._base is None else len(self._base)
+        if base_rows:
+            rows.append(np.asarray(self._base)[keep[:base_rows]])
+        if self._delta_rows:
+            rows.append(self._delta[:self._delta_rows][keep[base_rows:]])
+        return np.concatenate(rows) if rows else np.empty((0, self.dim), dtype=np.float32)
+
+    @classmethod
+    def from_array(cls, vectors: np.ndarray) -> "DenseIndex":
+        index = cls(vectors.shape[1])
+        index._base = vectors
+        return index
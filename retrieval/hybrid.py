@@ -0,0 +1,264 @@
+# hybrid.py
+# In-process hybrid retrieval: a BM25 inverted index and a hashed n-gram vector
+# index over the same documents, fused with reciprocal rank fusion. Documents are
+# addressed by caller keys (listing ids, section numbers) and can be added,
+# updated and removed incrementally; save() writes a compacted copy that load()
+# memory-maps, so a restart (or another worker) reuses it without rebuilding.
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from retrieval.dense import DIM, DenseIndex, HashedEmbedder
+from retrieval.lexical import BM25Index
+from retrieval.text import tokenize
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; saves are then only safe from one process
+    fcntl = None
+
+RRF_K = 60  # the usual reciprocal rank fusion constant
+CANDIDATE_POOL = 100  # per retriever, before fusion
+EMBED_BATCH = 4096
+MIN_SIMILARITY = 0.12  # dense hits below this cosine are mostly hash collisions
+FORMAT_VERSION = 1
+
+
+def fingerprint(items) -> str:
+    """Digest of (key, text) pairs; a saved index is only reused for the same documents."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, text in items:
+        digest.update(f"{key}\x00{text}\x00".encode())
+    return digest.hexdigest()
+
+
+@contextmanager
+def _directory_lock(path: str, exclusive: bool):
+    """flock on `path`/.lock: saves exclude each other and loads (forked workers share the directory)."""
+    try:
+        f = open(os.path.join(path, ".lock"), "a") if fcntl is not None else None
+    except OSError:  # a read-only directory: nothing is saving into it
+        f = None
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _top(slots: np.ndarray, scores: np.ndarray, count: int) -> np.ndarray:
+    """Slots of the `count` best scores, best first."""
+    if len(scores) > count:
+        part = np.argpartition(-scores, count - 1)[:count]
+        slots, scores = slots[part], scores[part]
+    return slots[np.argsort(-scores, kind="stable")]
+
+
+class HybridIndex:
+    def __init__(self, dim: int = DIM):
+        self.lexical = BM25Index()
+        self.dense = DenseIndex(dim)
+        self.embedder = HashedEmbedder(dim)
+        self.keys: list = []  # slot -> key
+        self.slots: dict = {}  # key -> live slot
+        self.alive = bytearray()
+        self.fingerprint: str | None = None  # of the documents a loaded index was saved from
+        # Searches read numpy views of the growable buffers that adds append to
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, key) -> bool:
+        return key in self.slots
+
+    def add(self, key, text: str):
+        """Index `text` under `key`, replacing any earlier version of it."""
+        self.add_many([(key, text)])
+
+    def add_many(self, items, batch: int = EMBED_BATCH):
+        """Index (key, text) pairs; vectors are embedded `batch` documents at a time."""
+        for embedded in self._embedded(items, batch):
+            with self._lock:
+                self._append(*embedded)
+
+    def prepare(self, items, batch: int = EMBED_BATCH) -> list:
+        """Tokenize and embed (key, text) pairs for `add_prepared`, leaving the searchable index as it is."""
+        return list(self._embedded(items, batch))
+
+    def add_prepared(self, prepared: list):
+        """Index the pairs `prepare` embedded, in one step under the lock."""
+        with self._lock:
+            for embedded in prepared:
+                self._append(*embedded)
+
+    def _embedded(self, items, batch: int):
+        items = list(items)
+        with self._lock:
+            self.dense.reserve(len(items))
+        for start in range(0, len(items), batch):
+            chunk = items[start:start + batch]
+            token_lists = [tokenize(text) for _, text in chunk]
+            yield chunk, token_lists, self.embedder.embed_many(token_lists)
+
+    def _append(self, chunk, token_lists, vectors):
+        first = len(self.keys)
+        for (key, _), tokens in zip(chunk, token_lists):
+            self.remove(key)
+            slot = len(self.keys)
+            self.lexical.add(slot, tokens)
+            self.keys.append(key)
+            self.alive.append(1)
+            self.slots[key] = slot
+        self.dense.add_many(first, vectors)
+
+    def remove(self, key) -> bool:
+        with self._lock:
+            slot = self.slots.pop(key, None)
+            if slot is None:
+                return False
+            self.alive[slot] = 0
+            self.lexical.remove(slot)
+            return True
+
+    @property
+    def dead(self) -> int:
+        return len(self.keys) - len(self.slots)
+
+    def search(self, query: str, k: int = 10, candidates=None, min_lexical: float = 0.0,
+               min_similarity: float = MIN_SIMILARITY, pool: int = CANDIDATE_POOL) -> list[tuple]:
+        """Top `k` (key, fused score) for `query`, optionally restricted to the keys in `candidates`.
+
+        Each retriever contributes its best `pool` hits above its threshold
+        (BM25 score > `min_lexical`, cosine >= `min_similarity`); ranks are fused
+        with 1 / (RRF_K + rank).
+        """
+        tokens = tokenize(query)
+        with self._lock:
+            if not tokens or not self.slots:
+                return []
+            if candidates is None:
+                allowed = None
+                mask = np.frombuffer(self.alive, dtype=np.uint8).view(bool)
+            else:
+                slots = self.slots
+                allowed = np.fromiter((slots[key] for key in candidates if key in slots), dtype=np.int64)
+                mask = np.zeros(len(self.keys), dtype=bool)
+                mask[allowed] = True
+
+            lexical_slots, lexical_scores = self.lexical.scores(tokens)
+            keep = mask[lexical_slots] & (lexical_scores > min_lexical)
+            lexical_ranked = _top(lexical_slots[keep], lexical_scores[keep], pool)
+
+            vector = self.embedder.embed_tokens(tokens)
+            if allowed is not None and len(allowed) * 4 < len(mask):
+                # A narrow candidate set: only score its rows
+                similarities = self.dense.similarities(vector, allowed)
+                keep = similarities >= min_similarity
+                dense_ranked = _top(allowed[keep], similarities[keep], pool)
+            else:
+                similarities = self.dense.similarities(vector)
+                dense_slots = np.flatnonzero(mask & (similarities >= min_similarity))
+                dense_ranked = _top(dense_slots, similarities[dense_slots], pool)
+
+            fused: dict[int, float] = {}
+            for ranked in (lexical_ranked, dense_ranked):
+                for rank, slot in enumerate(ranked.tolist()):
+                    fused[slot] = fused.get(slot, 0.0) + 1.0 / (RRF_K + rank + 1)
+            best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [(self.keys[slot], score) for slot, score in best]
+
+    # ---------------------------------------------------------------- persistence
+
+    def save(self, path: str, fingerprint: str | None = None):
+        """Write a compacted copy (removed documents dropped) to the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            keep = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            remap = np.cumsum(keep, dtype=np.int64) - 1
+            arrays = self.lexical.compacted(keep, remap)
+            arrays["vectors"] = self.dense.compacted(keep)
+            keys = [key for key, live in zip(self.keys, self.alive) if live]
+            vocab = list(self.lexical.vocab)
+        with _directory_lock(path, exclusive=True):
+            self._write(path, arrays, keys, vocab, fingerprint)
+
+    def _write(self, path: str, arrays: dict, keys: list, vocab: list, fingerprint: str | None):
+        # Temp names carry the pid so workers saving into the same directory never share one
+        suffix = f".{os.getpid()}.tmp"
+        for name, values in arrays.items():
+            # Written beside and renamed over the old file: a loaded index may still be mapping it
+            with open(os.path.join(path, f"{name}.npy{suffix}"), "wb") as f:
+                np.save(f, values)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in arrays:
+            os.replace(os.path.join(path, f"{name}.npy{suffix}"), os.path.join(path, f"{name}.npy"))
+        meta = {
+            "version": FORMAT_VERSION,
+            "dim": self.dense.dim,
+            "k1": self.lexical.k1,
+            "b": self.lexical.b,
+            "documents": len(keys),
+            "fingerprint": fingerprint,
+            "vocab": vocab,
+            "keys": keys,
+        }
+        # Written last: a directory without meta.json is an incomplete save
+        tmp = meta_path + suffix
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "HybridIndex":
+        """Open a saved index; postings and vectors stay on disk (memory-mapped) unless `mmap` is False."""
+        # Meta and arrays are opened under one lock, so they come from the same save
+        with _directory_lock(path, exclusive=False):
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta["version"] != FORMAT_VERSION:
+                raise ValueError(f"unsupported index format {meta['version']}")
+            mode = "r" if mmap else None
+            arrays = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                for name in ("postings_offsets", "postings_slots", "postings_tfs", "doc_len", "vectors")
+            }
+        index = cls(meta["dim"])
+        index.lexical = BM25Index.from_arrays(meta["vocab"], arrays, meta["k1"], meta["b"])
+        index.dense = DenseIndex.from_array(arrays["vectors"])
+        # JSON turns tuple keys into lists
+        index.keys = [tuple(key) if isinstance(key, list) else key for key in meta["keys"]]
+        index.slots = {key: slot for slot, key in enumerate(index.keys)}
+        index.alive = bytearray(b"\x01" * len(index.keys))
+        index.fingerprint = meta.get("fingerprint")
+        return index
+
+
+def open_index(path: str | None, items, dim: int = DIM) -> HybridIndex:
+    """Index of `items` ((key, text) pairs): loaded from `path` when it was saved
+    from the same documents, otherwise built and, if `path` is set, saved there."""
+    items = list(items)
+    digest = fingerprint(items)
+    if path and os.path.exists(os.path.join(path, "meta.json")):
+        try:
+            index = HybridIndex.load(path)
+        except (OSError, ValueError):
+            index = None
+        if index is not None and index.fingerprint == digest and index.dense.dim == dim:
+            return index
+    index = HybridIndex(dim)
+    index.add_many(items)
+    if path:
+        index.save(path, fingerprint=digest)
+    return index
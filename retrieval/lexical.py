@@ -0,0 +1,127 @@
+# lexical.py
+# BM25 inverted index over document slots. Postings loaded from disk stay
+# memory-mapped (a read-only CSR "base"); postings added since then go to small
+# per-term append-only arrays (the "delta"). Removal is the caller's alive mask:
+# removed slots keep their postings until the next save compacts them away.
+
+from array import array
+from collections import Counter
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+
+class BM25Index:
+    def __init__(self, k1: float = K1, b: float = B):
+        self.k1 = k1
+        self.b = b
+        self.vocab: dict[str, int] = {}
+        self.doc_len = array("I")  # per slot, removed slots included
+        self.total_len = 0  # over live documents
+        self.live = 0
+        self._base: tuple | None = None  # (offsets, slots, tfs) per term id
+        self._delta: dict[int, tuple[array, array]] = {}
+
+    def add(self, slot: int, tokens: list[str]):
+        if slot != len(self.doc_len):
+            raise ValueError("slots must be added in order")
+        for term, tf in Counter(tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self.vocab[term] = len(self.vocab)
+            postings = self._delta.get(term_id)
+            if postings is None:
+                postings = self._delta[term_id] = (array("i"), array("f"))
+            postings[0].append(slot)
+            postings[1].append(tf)
+        self.doc_len.append(len(tokens))
+        self.total_len += len(tokens)
+        self.live += 1
+
+    def remove(self, slot: int):
+        self.total_len -= self.doc_len[slot]
+        self.live -= 1
+
+    def postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        """(slots, term frequencies) of one term, base and delta together."""
+        parts_slots, parts_tfs = [], []
+        if self._base is not None and term_id + 1 < len(self._base[0]):
+            offsets, slots, tfs = self._base
+            start, stop = offsets[term_id], offsets[term_id + 1]
+            parts_slots.append(slots[start:stop])
+            parts_tfs.append(tfs[start:stop])
+        delta = self._delta.get(term_id)
+        if delta is not None:
+            parts_slots.append(np.frombuffer(delta[0], dtype=np.int32))
+            parts_tfs.append(np.frombuffer(delta[1], dtype=np.float32))
+        if len(parts_slots) == 1:
+            return parts_slots[0], parts_tfs[0]
+        if not parts_slots:
+            return np.empty(0, np.int32), np.empty(0, np.float32)
+        return np.concatenate(parts_slots), np.concatenate(parts_tfs)
+
+    def scores(self, tokens: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """BM25 score of every slot containing a query term, as (slots, scores).
+
+        Document frequencies include removed slots until the next compaction,
+        which only nudges idf.
+        """
+        n = len(self.doc_len)
+        if not n or not self.live:
+            return np.empty(0, np.int32), np.empty(0, np.float32)
+        avgdl = self.total_len / self.live
+        doc_len = np.frombuffer(self.doc_len, dtype=np.uint32)
+        all_slots, all_scores = [], []
+        for term in set(tokens):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            slots, tfs = self.postings(term_id)
+            if not len(slots):
+                continue
+            df = len(slots)
+            idf = np.log(1.0 + (self.live - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len[slots] / avgdl)
+            all_slots.append(slots)
+            all_scores.append((idf * tfs * (self.k1 + 1.0) / (tfs + norm)).astype(np.float32))
+        if not all_slots:
+            return np.empty(0, np.int32), np.empty(0, np.float32)
+        if len(all_slots) == 1:
+            return all_slots[0], all_scores[0]
+        # Summing into a dense per-slot array beats sorting the (often long) posting lists
+        totals = np.bincount(np.concatenate(all_slots), weights=np.concatenate(all_scores), minlength=n)
+        slots = np.flatnonzero(totals)
+        return slots.astype(np.int32), totals[slots].astype(np.float32)
+
+    # ---------------------------------------------------------------- persistence
+
+    def compacted(self, keep: np.ndarray, remap: np.ndarray) -> dict[str, np.ndarray]:
+        """CSR arrays for the slots in `keep` (bool mask), renumbered through `remap`."""
+        offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        slot_parts, tf_parts = [], []
+        for term_id in range(len(self.vocab)):
+            slots, tfs = self.postings(term_id)
+            if len(slots):
+                live = keep[slots]
+                slots, tfs = remap[slots[live]], tfs[live]
+            slot_parts.append(slots)
+            tf_parts.append(tfs)
+            offsets[term_id + 1] = offsets[term_id] + len(slots)
+        return {
+            "postings_offsets": offsets,
+            "postings_slots": np.concatenate(slot_parts).astype(np.int32) if slot_parts else np.empty(0, np.int32),
+            "postings_tfs": np.concatenate(tf_parts).astype(np.float32) if tf_parts else np.empty(0, np.float32),
+            "doc_len": np.frombuffer(self.doc_len, dtype=np.uint32)[keep].copy(),
+        }
+
+    @classmethod
+    def from_arrays(cls, vocab: list[str], arrays: dict, k1: float = K1, b: float = B) -> "BM25Index":
+        index = cls(k1, b)
+        index.vocab = {term: term_id for term_id, term in enumerate(vocab)}
+        index._base = (arrays["postings_offsets"], arrays["postings_slots"], arrays["postings_tfs"])
+        index.doc_len = array("I", np.asarray(arrays["doc_len"], dtype=np.uint32).tobytes())
+        index.total_len = int(np.asarray(arrays["doc_len"], dtype=np.uint64).sum())
+        index.live = len(index.doc_len)
+        return index
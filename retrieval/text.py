@@ -0,0 +1,51 @@
+# text.py
+# Tokenization shared by the lexical and dense indexes: lowercase words minus
+# stopwords and bare numbers (prices, beds and sqft are left to the structured
+# filters), with plural "s" stripped so "fireplaces" matches "fireplace".
+
+import re
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a about an and are as at be but by can could do does for from has have how i in into is it its me my near "
+    "of on or our please show some something that the their there this to want was we what where which "
+    "who will with would you your".split()
+)
+
+
+_TOKEN_CACHE_SIZE = 100_000
+_token_cache: dict[str, str | None] = {}
+_MISSING = object()
+
+
+def _token(word: str) -> str | None:
+    if word in STOPWORDS or word.isdigit():
+        return None
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    cache = _token_cache
+    if len(cache) >= _TOKEN_CACHE_SIZE:
+        cache.clear()
+    for word in _WORD_RE.findall((text or "").lower()):
+        token = cache.get(word, _MISSING)
+        if token is _MISSING:
+            token = cache[word] = _token(word)
+        if token is not None:
+            tokens.append(token)
+    return tokens
+
+
+def listing_text(record: dict) -> str:
+    """The searchable text of one listing."""
+    return " ".join((
+        record["name"],
+        record["typeofproperty"].replace("_", " "),
+        record["location"],
+        " ".join(record["features"]),
+        record["description"],
+    ))
@@ -0,0 +1,146 @@
+# fanout.py
+# Parallel multi-intent dispatch: a message that clearly asks several sub-agents
+# something ("condos for sale and for rent, and your phone number") is split into
+# one focused branch per intent, the branches run concurrently, and a single
+# synthesis call merges their answers. Each branch sees the conversation so far,
+# and callers can follow the branches as they start and finish (the stream
+# endpoint turns that into progress events).
+
+import asyncio
+from dataclasses import dataclass
+
+from routing.router import RouteDecision
+from serving.cache import normalize_message
+from serving.instrumentation import span
+from serving.streaming import PROGRESS_MESSAGES
+
+# An intent needs at least one strong phrase (weight 2.0) to get its own branch
+FANOUT_MIN_SCORE = 2.0
+BRANCH_TIMEOUT = 20.0
+
+# What each branch is asked to cover, prepended to the user's message
+BRANCH_FOCUS = {
+    "SaleAgent": "Answer only the part of this request about properties for sale",
+    "RentAgent": "Answer only the part of this request about properties for rent",
+    "WebsiteAgent": "Answer only the part of this request about the website",
+    "ContactAgent": "Answer only the part of this request about contact details or scheduling",
+}
+
+
+@dataclass
+class BranchResult:
+    agent: str
+    output: str | None
+    seconds: float
+    timed_out: bool = False
+    failed: bool = False
+
+
+class FanOutStats:
+    """Counters for multi-intent dispatches, exposed on the stats endpoint."""
+
+    def __init__(self):
+        self.dispatches = 0
+        self.branches = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.branch_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def record(self, results: list[BranchResult], wall_seconds: float):
+        self.dispatches += 1
+        self.branches += len(results)
+        self.timeouts += sum(result.timed_out for result in results)
+        self.failures += sum(result.failed for result in results)
+        self.branch_seconds += sum(result.seconds for result in results)
+        self.wall_seconds += wall_seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "dispatches": self.dispatches,
+            "branches": self.branches,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "avg_branches": self.branches / self.dispatches if self.dispatches else 0.0,
+            # Sum of branch times over wall time: ~1 when sequential, ~branches when fully parallel
+            "parallel_speedup": self.branch_seconds / self.wall_seconds if self.wall_seconds else 0.0,
+        }
+
+
+class FanOut:
+    """Plans branches from the router's scores, runs them with `asyncio.gather` and synthesizes one answer."""
+
+    def __init__(self, sub_agents: dict, synthesis_agent, flight=None, branch_timeout: float = BRANCH_TIMEOUT,
+                 min_score: float = FANOUT_MIN_SCORE, enabled: bool = True):
+        self.sub_agents = sub_agents
+        self.synthesis_agent = synthesis_agent
+        self.flight = flight
+        self.branch_timeout = branch_timeout
+        self.min_score = min_score
+        self.enabled = enabled
+        self.stats = FanOutStats()
+
+    def plan(self, decision: RouteDecision) -> list[str]:
+        """Sub-agent names to run in parallel, or [] when the message has fewer than two clear intents."""
+        if not self.enabled:
+            return []
+        agents = [agent for agent, score in decision.scores.items() if score >= self.min_score and agent in self.sub_agents]
+        return agents if len(agents) > 1 else []
+
+    async def _branch(self, agent_name: str, message: str, run_config, build_input, on_progress) -> BranchResult:
+        from agents import Runner
+
+        agent = self.sub_agents[agent_name]
+        branch_message = f"{BRANCH_FOCUS.get(agent_name, 'Answer your part of this request')}: {message}"
+        branch_input = build_input(branch_message) if build_input is not None else branch_message
+
+        async def run():
+            return await Runner.run(agent, branch_input, run_config=run_config)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if on_progress is not None:
+            on_progress({"type": "progress", "agent": agent_name, "tool": None,
+                         "message": PROGRESS_MESSAGES.get(agent_name, "Working on it…")})
+        with span("branch", agent_name):
+            try:
+                # Only history-free branches are shared: with history the answer belongs to one conversation
+                if self.flight is not None and isinstance(branch_input, str):
+                    call = self.flight.do((agent_name, normalize_message(branch_input)), run)
+                else:
+                    call = run()
+                result = await asyncio.wait_for(call, self.branch_timeout)
+                result = BranchResult(agent_name, result.final_output, loop.time() - started)
+            except asyncio.TimeoutError:
+                result = BranchResult(agent_name, None, loop.time() - started, timed_out=True)
+            except Exception:
+                result = BranchResult(agent_name, None, loop.time() - started, failed=True)
+        if on_progress is not None:
+            on_progress({"type": "progress", "agent": agent_name, "tool": None,
+                         "message": "Done." if result.output is not None else "This part could not be answered."})
+        return result
+
+    async def run_branches(self, agents: list[str], message: str, run_config=None, build_input=None,
+                           on_progress=None) -> list[BranchResult]:
+        """Run one branch per agent concurrently.
+
+        `build_input(text)` turns a branch's focused message into the Runner input
+        (e.g. prepends the session history); `on_progress(event)` is called with a
+        progress event as each branch starts and finishes.
+        """
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(self._branch(agent, message, run_config, build_input, on_progress)
+                                         for agent in agents))
+        self.stats.record(results, asyncio.get_running_loop().time() - started)
+        return results
+
+    @staticmethod
+    def synthesis_prompt(message: str, results: list[BranchResult]) -> str:
+        parts = [f"User request: {message}", ""]
+        for result in results:
+            if result.output is not None:
+                parts.append(f"[{result.agent}]\n{result.output}")
+            else:
+                reason = "did not answer in time" if result.timed_out else "failed"
+                parts.append(f"[{result.agent}]\n(unavailable: {reason}; tell the user this part could not be answered right now)")
+        return "\n\n".join(parts)
@@ -0,0 +1,97 @@
+# router.py
+# Cheap local intent router that sends clear-cut messages straight to a sub-agent,
+# skipping the orchestrator's model round trip. Ambiguous messages fall back to it.
+
+import re
+from dataclasses import dataclass, field
+
+MIN_CONFIDENCE = 0.6
+
+# (pattern, weight) per sub-agent tool name; strong phrases weigh more than single words
+INTENT_PATTERNS = {
+    "SaleAgent": [
+        (r"\bfor sale\b", 2.0),
+        (r"\b(buy|buying|purchase|purchasing)\b", 2.0),
+        (r"\b(sale|sell|selling|mortgage|down payment)\b", 1.0),
+        (r"\b(invest|investment|own|owning)\b", 1.0),
+    ],
+    "RentAgent": [
+        (r"\b(for rent|to rent|for lease)\b", 2.0),
+        (r"\b(rent|rental|rentals|renting|lease|leasing)\b", 1.0),
+        (r"\b(per month|monthly|/mo|a month|tenant)\b", 1.0),
+    ],
+    "WebsiteAgent": [
+        (r"\b(website|web site|this site|platform|web page|webpage)\b", 2.0),
+        (r"\b(newsletter|testimonials?|tech stack|next\.?js|tailwind|subscribe)\b", 2.0),
+        (r"\b(what is this|what do you do|your services|how do i use|features of)\b", 1.0),
+    ],
+    "ContactAgent": [
+        (r"\b(phone|phone number|telephone|e-?mail|contact)\b", 2.0),
+        (r"\b(schedule|meeting|appointment|consultation|viewing|office hours)\b", 2.0),
+        (r"\b(call|reach you|get in touch|talk to)\b", 1.0),
+    ],
+}
+
+_COMPILED = {
+    agent: [(re.compile(pattern, re.I), weight) for pattern, weight in patterns]
+    for agent, patterns in INTENT_PATTERNS.items()
+}
+
+
+@dataclass
+class RouteDecision:
+    agent: str | None  # None means "let the orchestrator decide"
+    confidence: float
+    scores: dict = field(default_factory=dict)
+
+
+class RouterStats:
+    """Counters for routing decisions, exposed on the stats endpoint."""
+
+    def __init__(self):
+        self.total = 0
+        self.fallbacks = 0
+        self.routed: dict[str, int] = {agent: 0 for agent in INTENT_PATTERNS}
+        self.confidence_sum = 0.0
+
+    def record(self, decision: RouteDecision):
+        self.total += 1
+        self.confidence_sum += decision.confidence
+        if decision.agent is None:
+            self.fallbacks += 1
+        else:
+            self.routed[decision.agent] = self.routed.get(decision.agent, 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            "total": self.total,
+            "fallbacks": self.fallbacks,
+            "routed": dict(self.routed),
+            "fast_path_ratio": (self.total - self.fallbacks) / self.total if self.total else 0.0,
+            "avg_confidence": self.confidence_sum / self.total if self.total else 0.0,
+        }
+
+
+class IntentRouter:
+    """Keyword/regex scorer; routes only when one intent clearly dominates."""
+
+    def __init__(self, min_confidence: float = MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.stats = RouterStats()
+
+    def score(self, message: str) -> dict[str, float]:
+        return {
+            agent: sum((weight for regex, weight in patterns if regex.search(message)), 0.0)
+            for agent, patterns in _COMPILED.items()
+        }
+
+    def route(self, message: str) -> RouteDecision:
+        scores = self.score(message or "")
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, top), (_, runner_up) = ranked[0], ranked[1]
+        # +1 smoothing so a single weak keyword is never enough on its own
+        confidence = top / (top + runner_up + 1.0)
+        agent = best if top > 0 and confidence >= self.min_confidence else None
+        decision = RouteDecision(agent=agent, confidence=round(confidence, 3), scores=scores)
+        self.stats.record(decision)
+        return decision
@@ -0,0 +1,47 @@
+# agent_hooks.py
+# Agent lifecycle hooks that turn agent turns and model calls into spans and
+# token counters (see instrumentation.py).
+
+import time
+
+from agents import AgentHooks
+
+from serving.instrumentation import metrics, record_span
+
+
+class InstrumentationHooks(AgentHooks):
+    """Agent lifecycle hooks: one span per agent turn and per model call, plus token counts.
+
+    Start times are kept on the run's context wrapper, so concurrent runs of the
+    same agent do not collide and nothing outlives the run.
+    """
+
+    @staticmethod
+    def _starts(context) -> dict:
+        starts = getattr(context, "_span_starts", None)
+        if starts is None:
+            starts = {}
+            try:
+                context._span_starts = starts
+            except AttributeError:
+                pass
+        return starts
+
+    async def on_start(self, context, agent):
+        self._starts(context)[("agent", agent.name)] = time.perf_counter()
+
+    async def on_end(self, context, agent, output):
+        started = self._starts(context).pop(("agent", agent.name), None)
+        if started is not None:
+            record_span("agent", agent.name, time.perf_counter() - started)
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._starts(context)[("llm", agent.name)] = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        started = self._starts(context).pop(("llm", agent.name), None)
+        usage = response.usage
+        if started is not None:
+            record_span("llm", agent.name, time.perf_counter() - started, input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+        metrics.inc("chatbot_llm_tokens_total", usage.input_tokens, agent=agent.name, direction="input")
+        metrics.inc("chatbot_llm_tokens_total", usage.output_tokens, agent=agent.name, direction="output")
@@ -0,0 +1,378 @@
+# cache.py
+# Response cache for /chat: exact hits on a normalized message, optional n-gram
+# similarity for near-duplicates, TTL + LRU eviction and tag-based invalidation,
+# plus per-entry dependencies (e.g. the listings an answer showed) for targeted
+# invalidation when only part of the catalog changes.
+
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+_PUNCT_RE = re.compile(r"[^\w\s$]")
+_NUMBER_RE = re.compile(r"\d+")
+# "isn't" normalizes to "isn t"
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|without|except|excluding|t)\b")
+
+DEFAULT_TTL = 600.0
+DEFAULT_MAX_ENTRIES = 2048
+
+
+def normalize_message(message: str) -> str:
+    """'  Show VILLAS for sale!! ' -> 'show villas for sale'"""
+    return " ".join(_PUNCT_RE.sub(" ", (message or "").lower()).split())
+
+
+# Read when an answer starts being built: the global generation, and a counter bumped
+# by every tag invalidation (the answering agent's tag is only known at the end)
+GENERATION_KEYS = ["gen:*", "gen:tags"]
+
+
+class Dependencies:
+    """What one answer is built from, with the counters as they were when it read them.
+
+    `generations` are taken when collection starts (ResponseCache.dependencies())
+    and each dependency's counter when a tool first records it, so an invalidation
+    that lands while the answer is still being built makes the cached entry stale.
+    """
+
+    def __init__(self, backend, generations: dict[str, int]):
+        self.backend = backend
+        self.generations = generations
+        self.counters: dict[str, int] = {}
+
+    def add(self, tags):
+        new = [tag for tag in dict.fromkeys(tags) if tag not in self.counters]
+        if new:
+            self.counters.update(zip(new, self.backend.counters([f"dep:{tag}" for tag in new])))
+
+    def fork(self) -> "Dependencies":
+        """An empty collector with the same starting generations, e.g. for a shared (coalesced) run."""
+        return Dependencies(self.backend, dict(self.generations))
+
+    def merge(self, other: "Dependencies"):
+        """Take in what `other` recorded; the older snapshot of a counter wins."""
+        for key, value in other.generations.items():
+            self.generations[key] = min(self.generations.get(key, value), value)
+        for tag, value in other.counters.items():
+            self.counters[tag] = min(self.counters.get(tag, value), value)
+
+    def __iter__(self):
+        return iter(self.counters)
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+
+_dependencies: ContextVar["Dependencies | None"] = ContextVar("cache_dependencies", default=None)
+
+
+def collect_dependencies(dependencies: Dependencies | None) -> Dependencies | None:
+    """Record what the current request's answer is built from into `dependencies` (from ResponseCache.dependencies())."""
+    _dependencies.set(dependencies)
+    return dependencies
+
+
+def current_dependencies() -> Dependencies | None:
+    return _dependencies.get()
+
+
+def depends_on(*tags: str):
+    """Called by tools: the answer being built depends on `tags` (no-op outside a collecting request).
+
+    Reads the tags' counters, so call it from a worker thread when the backend blocks.
+    """
+    dependencies = _dependencies.get()
+    if dependencies is not None:
+        dependencies.add(tags)
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InMemoryBackend:
+    """Process-local backend: an OrderedDict in LRU order with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[float | None, object]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+
+    def get(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def counters(self, keys: list[str]) -> list[int]:
+        return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key: str) -> int:
+        # Counters live outside the LRU so invalidation generations are never evicted
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """Shared backend so several workers see each other's hits.
+
+    Takes any client with the redis-py `get`/`set(ex=)`/`delete`/`incr`/`mget` API,
+    so a fake in-memory client can stand in for it. Calls on a network client
+    block, so ResponseCache's async methods run them in a worker thread.
+    """
+
+    def __init__(self, client, prefix: str = "chatcache:"):
+        self.client = client
+        self.prefix = prefix
+        self.blocking = getattr(client, "blocking", True)
+        self.evictions = 0  # eviction happens server-side (maxmemory-policy allkeys-lru)
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value, ttl: float | None = None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def counters(self, keys: list[str]) -> list[int]:
+        """Several counters in one round trip (MGET)."""
+        return [int(value or 0) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def clear(self):
+        # Bumping the global generation (ResponseCache.invalidate) hides every entry;
+        # TTLs then reclaim the space.
+        pass
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.stale_sets = 0
+        self.invalidations = 0
+
+    def snapshot(self, evictions: int = 0) -> dict:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "stale_sets": self.stale_sets,
+            "evictions": evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """Caches final chat responses keyed on the normalized message.
+
+    Every entry carries a tag (the agent that answered) and the generations the
+    answer was built under. `invalidate(tags)` bumps those generations in the
+    backend, so stale entries are ignored by every worker sharing it without
+    scanning keys. Entries can also list dependencies, checked the same way and
+    bumped by `invalidate_dependencies`. The counters are snapshotted while the
+    answer is built (see `Dependencies`), not when it is stored, so an
+    invalidation that lands in between is not lost.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        ttl: float | None = DEFAULT_TTL,
+        similarity_threshold: float | None = None,
+        max_similarity_keys: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_similarity_keys = max_similarity_keys
+        self.stats = CacheStats()
+        # Near-duplicate lookup: normalized keys this process has stored, with trigram postings
+        self._similar_keys: OrderedDict[str, set[str]] = OrderedDict()
+        self._postings: dict[str, set[str]] = {}
+        # The async methods may run lookups in worker threads
+        self._similar_lock = threading.Lock()
+
+    def dependencies(self) -> Dependencies:
+        """A collector for one answer, holding the generations as they are now; pass it to `collect_dependencies`."""
+        return Dependencies(self.backend, dict(zip(GENERATION_KEYS, self.backend.counters(GENERATION_KEYS))))
+
+    def _counters(self, tag: str, dependencies) -> list[int]:
+        """Global generation, `tag`'s generation and each dependency's counter, in one backend call."""
+        return self.backend.counters(["gen:*", f"gen:{tag}"] + [f"dep:{dependency}" for dependency in dependencies])
+
+    def _lookup(self, key: str):
+        entry = self.backend.get(f"msg:{key}")
+        if entry is None:
+            return None
+        dependencies = entry.get("deps", {})
+        stale = self._counters(entry["tag"], dependencies) != [*entry["gen"], *dependencies.values()]
+        if stale:
+            self.backend.delete(f"msg:{key}")
+            return None
+        return entry["response"]
+
+    def _remember(self, key: str):
+        if self.similarity_threshold is None:
+            return
+        with self._similar_lock:
+            self._remember_locked(key)
+
+    def _remember_locked(self, key: str):
+        if key in self._similar_keys:
+            self._similar_keys.move_to_end(key)
+            return
+        grams = _trigrams(key)
+        self._similar_keys[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        while len(self._similar_keys) > self.max_similarity_keys:
+            old_key, old_grams = self._similar_keys.popitem(last=False)
+            for gram in old_grams:
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(old_key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def _most_similar(self, key: str) -> str | None:
+        with self._similar_lock:
+            return self._most_similar_locked(key)
+
+    def _most_similar_locked(self, key: str) -> str | None:
+        grams = _trigrams(key)
+        overlap: dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+        numbers = _NUMBER_RE.findall(key)
+        negations = _NEGATION_RE.findall(key)
+        best, best_score = None, 0.0
+        for candidate, shared in overlap.items():
+            # "rent under 3000" and "rent under 5000" look alike but are different questions
+            if _NUMBER_RE.findall(candidate) != numbers:
+                continue
+            # Trigram overlap cannot see "for sale" vs "not for sale"
+            if _NEGATION_RE.findall(candidate) != negations:
+                continue
+            # Jaccard similarity of the two trigram sets
+            score = shared / (len(grams) + len(self._similar_keys[candidate]) - shared)
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= self.similarity_threshold else None
+
+    def get(self, message: str):
+        key = normalize_message(message)
+        response = self._lookup(key)
+        if response is not None:
+            self.stats.hits += 1
+            return response
+        if self.similarity_threshold is not None:
+            similar = self._most_similar(key)
+            if similar is not None and similar != key:
+                response = self._lookup(similar)
+                if response is not None:
+                    self.stats.similar_hits += 1
+                    return response
+        self.stats.misses += 1
+        return None
+
+    def set(self, message: str, response, tag: str = "default", dependencies=()):
+        """Store `response`; `dependencies` is the request's collector, or plain tags read as of now."""
+        key = normalize_message(message)
+        if not isinstance(dependencies, Dependencies):
+            tags, dependencies = dependencies, self.dependencies()
+            dependencies.add(tags)
+        # The tag's generation before the tag-invalidation counter: invalidate() bumps them the other way round
+        tag_generation, tags_generation = self.backend.counters([f"gen:{tag}", "gen:tags"])
+        if tags_generation != dependencies.generations["gen:tags"]:
+            # A tag was invalidated while this answer was being built and it may have been ours
+            self.stats.stale_sets += 1
+            return
+        entry = {"response": response, "tag": tag, "gen": [dependencies.generations["gen:*"], tag_generation]}
+        if dependencies.counters:
+            entry["deps"] = dict(dependencies.counters)
+        self.backend.set(f"msg:{key}", entry, ttl=self.ttl)
+        self._remember(key)
+        self.stats.sets += 1
+
+    def invalidate(self, tags=None):
+        """Drop cached responses for `tags` (e.g. the listing agents), or everything when None."""
+        self.stats.invalidations += 1
+        if tags is None:
+            self.backend.incr("gen:*")
+            self.backend.clear()
+            return
+        self.backend.incr("gen:tags")
+        for tag in tags:
+            self.backend.incr(f"gen:{tag}")
+
+    def invalidate_dependencies(self, dependencies):
+        """Drop only the cached responses that recorded one of `dependencies`."""
+        self.stats.invalidations += 1
+        for dependency in dependencies:
+            self.backend.incr(f"dep:{dependency}")
+
+    # Async variants for request handlers: a blocking (network) backend is called from a worker thread
+
+    async def _call(self, fn, *args, **kwargs):
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def adependencies(self) -> Dependencies:
+        return await self._call(self.dependencies)
+
+    async def aget(self, message: str):
+        return await self._call(self.get, message)
+
+    async def aset(self, message: str, response, tag: str = "default", dependencies=()):
+        await self._call(self.set, message, response, tag=tag, dependencies=dependencies)
+
+    async def ainvalidate_dependencies(self, dependencies):
+        await self._call(self.invalidate_dependencies, dependencies)
+
+    def snapshot(self) -> dict:
+        stats = self.stats.snapshot(evictions=getattr(self.backend, "evictions", 0))
+        stats["size"] = len(self.backend) if hasattr(self.backend, "__len__") else None
+        return stats
@@ -0,0 +1,89 @@
+# coalesce.py
+# Single-flight request coalescing: concurrent callers with the same key await one
+# shared run instead of each starting their own upstream model calls.
+
+import asyncio
+
+from serving.cache import collect_dependencies, current_dependencies, normalize_message
+from serving.instrumentation import span
+
+
+class SingleFlight:
+    """Runs one coroutine per key at a time and hands its result to every concurrent caller.
+
+    The shared run lives in its own task, so one caller going away (client
+    disconnect) does not cancel it for the others; it is only cancelled once
+    every waiter has left. The cache dependencies the run records are handed
+    to every caller, so each one's cached answer is invalidated with it.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.leaders = 0
+        self.followers = 0
+        self._inflight: dict = {}  # key -> [task, waiter count, shared Dependencies or None]
+
+    async def do(self, key, fn):
+        if not self.enabled:
+            self.leaders += 1
+            return await fn()
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.leaders += 1
+            caller = current_dependencies()
+            dependencies = caller.fork() if caller is not None else None
+
+            async def run():
+                # The task has its own context: record into a collector every caller merges
+                if dependencies is not None:
+                    collect_dependencies(dependencies)
+                return await fn()
+
+            task = asyncio.ensure_future(run())
+            entry = self._inflight[key] = [task, 0, dependencies]
+
+            def forget(_):
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.followers += 1
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(entry[0])
+            collector = current_dependencies()
+            if collector is not None and entry[2] is not None:
+                collector.merge(entry[2])
+            return result
+        except asyncio.CancelledError:
+            if not entry[0].done() and entry[1] == 1:
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def snapshot(self) -> dict:
+        calls = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalesced_ratio": self.followers / calls if calls else 0.0,
+        }
+
+
+def coalesced_as_tool(agent, flight: SingleFlight, tool_name: str, tool_description: str):
+    """Like `agent.as_tool(...)`, but identical concurrent inputs share one sub-agent run."""
+    from agents import ItemHelpers, RunContextWrapper, Runner, function_tool
+
+    @function_tool(name_override=tool_name, description_override=tool_description)
+    async def run_agent(context: RunContextWrapper, input: str) -> str:
+        async def run():
+            return await Runner.run(starting_agent=agent, input=input, context=context.context)
+
+        with span("subagent", tool_name):
+            output = await flight.do((tool_name, normalize_message(input)), run)
+        return ItemHelpers.text_message_outputs(output.new_items)
+
+    return run_agent
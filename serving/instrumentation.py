@@ -0,0 +1,224 @@
+# instrumentation.py
+# Always-on, low-overhead instrumentation: spans for agent turns, sub-agent and
+# function tool calls, model calls and upstream HTTP requests. Spans feed
+# Prometheus-style metrics (served on /metrics) and one structured JSON log line
+# per request. The agent lifecycle hooks live in agent_hooks.py so this module
+# does not import the agents SDK.
+
+import json
+import logging
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+
+logger = logging.getLogger("chatbot")
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(DURATION_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by (name, labels), plus collectors read at scrape time."""
+
+    def __init__(self):
+        self.help: dict[str, tuple[str, str]] = {}
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, _Histogram] = {}
+        self.collectors = []
+
+    def describe(self, name: str, kind: str, text: str):
+        self.help[name] = (kind, text)
+
+    def inc(self, name: str, value: float = 1.0, /, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, /, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = _Histogram()
+        histogram.observe(value)
+
+    def add_collector(self, collector):
+        """`collector()` returns an iterable of (name, kind, labels, value) read at scrape time."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        families: dict[str, list[str]] = {}
+        for (name, labels), value in self.counters.items():
+            families.setdefault(name, []).append(f"{name}{_labels(dict(labels))} {value}")
+        for (name, labels), histogram in self.histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels({**dict(labels), 'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(dict(labels))} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(dict(labels))} {histogram.count}")
+        for collector in self.collectors:
+            for name, kind, labels, value in collector():
+                self.help.setdefault(name, (kind, name))
+                families.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+
+        out = []
+        for name in sorted(families):
+            kind, text = self.help.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(families[name])
+        return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe("chatbot_span_duration_seconds", "histogram", "Duration of agent turns, sub-agent/tool calls, model calls and upstream HTTP requests.")
+metrics.describe("chatbot_span_errors_total", "counter", "Spans that ended with an exception.")
+metrics.describe("chatbot_llm_tokens_total", "counter", "Model tokens by agent and direction.")
+metrics.describe("chatbot_requests_total", "counter", "HTTP requests by route and status.")
+metrics.describe("chatbot_request_duration_seconds", "histogram", "HTTP request duration by route.")
+
+# ---------------------------------------------------------------- tracing
+
+_trace: ContextVar["Trace | None"] = ContextVar("chatbot_trace", default=None)
+
+
+class Trace:
+    """Spans and attributes for one HTTP request, logged as one JSON line at the end."""
+
+    __slots__ = ("request_id", "started", "spans", "attrs")
+
+    def __init__(self, request_id: str | None = None):
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+        self.attrs: dict = {}
+
+
+def annotate(**attrs):
+    """Attach attributes (e.g. cache="hit") to the current request's log line."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+def record_span(kind: str, name: str, duration: float, error: bool = False, **attrs):
+    metrics.observe("chatbot_span_duration_seconds", duration, kind=kind, name=name)
+    if error:
+        metrics.inc("chatbot_span_errors_total", kind=kind, name=name)
+    trace = _trace.get()
+    if trace is not None:
+        entry = {"kind": kind, "name": name, "ms": round(duration * 1000, 3)}
+        if attrs:
+            entry.update(attrs)
+        if error:
+            entry["error"] = True
+        trace.spans.append(entry)
+
+
+class span:
+    """`with span("tool", "sale_properties", query=query): ...` (works in sync and async code)."""
+
+    __slots__ = ("kind", "name", "attrs", "started")
+
+    def __init__(self, kind: str, name: str, **attrs):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.kind, self.name, time.perf_counter() - self.started, error=exc_type is not None, **self.attrs)
+        return False
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware (no response buffering, streaming-safe) that opens a Trace per request."""
+
+    def __init__(self, app, skip_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        token = _trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            duration = time.perf_counter() - trace.started
+            path = scope["path"]
+            # Label by route template so ids in the URL (and 404 probes) don't mint new series
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            metrics.inc("chatbot_requests_total", path=route, status=status)
+            metrics.observe("chatbot_request_duration_seconds", duration, path=route)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({
+                    "event": "request",
+                    "request_id": trace.request_id,
+                    "method": scope["method"],
+                    "path": path,
+                    "status": status,
+                    "ms": round(duration * 1000, 3),
+                    **trace.attrs,
+                    "spans": trace.spans,
+                }))
+
+
+def configure_logging(level: str = "INFO"):
+    """Send the chatbot logger's JSON lines to stderr, one object per line."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+
+
+def snapshot_metrics(prefix: str, snapshot: dict, **labels):
+    """Collector rows for the numeric fields of a `.snapshot()` dict; one level of nested dicts becomes a `key` label."""
+    for field, value in snapshot.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            yield f"{prefix}_{field}", "gauge", labels, value
+        elif isinstance(value, dict):
+            for key, inner in value.items():
+                if isinstance(inner, (int, float)) and not isinstance(inner, bool):
+                    yield f"{prefix}_{field}", "gauge", {**labels, "key": key}, inner
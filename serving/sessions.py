@@ -0,0 +1,242 @@
+# sessions.py
+# Server-side conversation sessions. History is trimmed to a token budget and the
+# turns that fall out of it are rolled into a short summary, so the prompt sent
+# each turn stays roughly constant no matter how long the conversation runs.
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+HISTORY_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 300
+IDLE_TTL = 30 * 60.0
+MAX_SESSIONS = 50_000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    for end in (". ", "? ", "! ", "\n"):
+        index = text.find(end)
+        if 0 < index < limit:
+            return text[:index + 1]
+    return text[:limit] + ("…" if len(text) > limit else "")
+
+
+def extractive_summary(previous: str, turns: list[dict], token_budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Fold `turns` into `previous` without a model call; keeps the newest lines when over budget."""
+    lines = [line for line in previous.split("\n") if line] if previous else []
+    for turn in turns:
+        speaker = "User" if turn["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {_first_sentence(turn['content'])}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > token_budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class InMemorySessionBackend:
+    """Sessions in an OrderedDict kept in last-access order, so idle and LRU eviction pop from the front."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._data: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, session_id: str) -> dict | None:
+        return self._data.get(session_id)
+
+    def put(self, session_id: str, session: dict):
+        self._data[session_id] = session
+        self._data.move_to_end(session_id)
+        while len(self._data) > self.max_sessions:
+            self._data.popitem(last=False)
+
+    def delete(self, session_id: str):
+        self._data.pop(session_id, None)
+
+    def evict_idle(self, cutoff: float) -> int:
+        evicted = 0
+        while self._data:
+            session_id, session = next(iter(self._data.items()))
+            if session["updated_at"] >= cutoff:
+                break
+            del self._data[session_id]
+            evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteSessionBackend:
+    """Persistent sessions in a single SQLite table; survives restarts and can be shared by workers on one host."""
+
+    # Queries can wait on the disk or on another worker's write lock, so SessionStore runs them in a thread
+    blocking = True
+
+    def __init__(self, path: str = "sessions.db", max_sessions: int = MAX_SESSIONS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self._connect()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        # A connection must not be used across fork(): forked workers open their own
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def get(self, session_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, session: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, json.dumps(session), session["updated_at"]),
+            )
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_idle(self, cutoff: float) -> int:
+        with self._lock:
+            evicted = self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            overflow = len(self) - self.max_sessions
+            if overflow > 0:
+                evicted += self._db.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated_at LIMIT ?)", (overflow,)
+                ).rowcount
+        return evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SharedSessionBackend:
+    """Sessions in a shared store (serving/shared.py), so any worker can continue any conversation.
+
+    Idle sessions expire through the store's TTL instead of a sweep, and the
+    session count is not tracked.
+    """
+
+    def __init__(self, client, idle_ttl: float = IDLE_TTL, prefix: str = "session:"):
+        self.client = client
+        self.idle_ttl = idle_ttl
+        self.prefix = prefix
+        self.blocking = getattr(client, "blocking", True)
+
+    def get(self, session_id: str) -> dict | None:
+        raw = self.client.get(self.prefix + session_id)
+        return None if raw is None else json.loads(raw)
+
+    def put(self, session_id: str, session: dict):
+        self.client.set(self.prefix + session_id, json.dumps(session), ex=int(self.idle_ttl))
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+    def evict_idle(self, cutoff: float) -> int:
+        return 0
+
+
+class SessionStore:
+    """Loads a session, builds the model input for the next turn and records the turn afterwards."""
+
+    def __init__(
+        self,
+        backend=None,
+        history_token_budget: int = HISTORY_TOKEN_BUDGET,
+        summary_token_budget: int = SUMMARY_TOKEN_BUDGET,
+        idle_ttl: float = IDLE_TTL,
+        summarizer=extractive_summary,
+        sweep_every: int = 256,
+    ):
+        self.backend = backend if backend is not None else InMemorySessionBackend()
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+        self.idle_ttl = idle_ttl
+        self.summarizer = summarizer
+        self.sweep_every = sweep_every
+        self.evicted = 0
+        self._writes = 0
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def load(self, session_id: str) -> dict:
+        session = self.backend.get(session_id)
+        if session is None or session["updated_at"] < time.time() - self.idle_ttl:
+            return {"summary": "", "turns": [], "updated_at": time.time()}
+        return session
+
+    def build_input(self, session: dict, message: str) -> list[dict] | str:
+        """Summary + recent turns + the new message, in the Responses input format the Runner takes."""
+        if not session["summary"] and not session["turns"]:
+            return message
+        items = []
+        if session["summary"]:
+            items.append({"role": "system", "content": f"Summary of the earlier conversation:\n{session['summary']}"})
+        items.extend({"role": turn["role"], "content": turn["content"]} for turn in session["turns"])
+        items.append({"role": "user", "content": message})
+        return items
+
+    def record(self, session_id: str, session: dict, message: str, response: str):
+        turns = session["turns"] + [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": str(response)},
+        ]
+        # Keep the newest turns that fit the budget; roll the rest into the summary
+        kept, used = [], 0
+        for turn in reversed(turns):
+            used += estimate_tokens(turn["content"])
+            if used > self.history_token_budget and kept:
+                break
+            kept.append(turn)
+        kept.reverse()
+        dropped = turns[:len(turns) - len(kept)]
+        summary = session["summary"]
+        if dropped:
+            summary = self.summarizer(summary, dropped, self.summary_token_budget)
+
+        self.backend.put(session_id, {"summary": summary, "turns": kept, "updated_at": time.time()})
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.evict_idle()
+
+    # Async variants for request handlers: a blocking (network or disk) backend is called from a worker thread
+
+    async def aload(self, session_id: str) -> dict:
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(self.load, session_id)
+        return self.load(session_id)
+
+    async def arecord(self, session_id: str, session: dict, message: str, response: str):
+        if getattr(self.backend, "blocking", False):
+            await asyncio.to_thread(self.record, session_id, session, message, response)
+        else:
+            self.record(session_id, session, message, response)
+
+    def evict_idle(self) -> int:
+        evicted = self.backend.evict_idle(time.time() - self.idle_ttl)
+        self.evicted += evicted
+        return evicted
+
+    def snapshot(self) -> dict:
+        sessions = len(self.backend) if hasattr(self.backend, "__len__") else None
+        return {"sessions": sessions, "evicted": self.evicted}
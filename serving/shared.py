@@ -0,0 +1,116 @@
+# shared.py
+# State that several worker processes must agree on: cached answers, sessions and
+# the upstream rate limit. Everything goes through a client with the small
+# redis-py API subset used here (get, mget, set with ex=, delete, incr, expire),
+# so a Redis server coordinates the workers and InMemoryClient stands in for it
+# in a single process (one worker, tests, benchmarks). redis-py calls block, so
+# the async callers run them in a worker thread unless the client is in-process.
+
+import math
+import threading
+import time
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class InMemoryClient:
+    """Process-local stand-in for a Redis client: per-key expiry, atomic incr, thread-safe."""
+
+    # Calls never wait on I/O, so callers need not move them off the event loop
+    blocking = False
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, object]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._live(key)
+            return None if item is None else item[1]
+
+    def mget(self, keys: list[str]) -> list:
+        with self._lock:
+            return [None if (item := self._live(key)) is None else item[1] for key in keys]
+
+    def set(self, key: str, value, ex: int | None = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            item = self._live(key)
+            expires_at, value = item if item is not None else (None, 0)
+            value = int(value) + amount
+            self._data[key] = (expires_at, value)
+            return value
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return False
+            self._data[key] = (time.monotonic() + seconds, item[1])
+            return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def connect(url: str):
+    """Client for SHARED_STATE_URL: "memory://" for the in-process stand-in, redis://... for a server."""
+    if url.startswith("memory:"):
+        return InMemoryClient()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if not REDIS_AVAILABLE:
+            raise ValueError("a redis:// SHARED_STATE_URL needs the redis package (the 'redis' extra)")
+        return redis.Redis.from_url(url)
+    raise ValueError(f"unsupported SHARED_STATE_URL {url!r} (expected memory:// or redis://)")
+
+
+class SharedRateLimit:
+    """Fixed-window request counter shared by every worker using the same client.
+
+    `rate_per_second` is turned into a whole number of calls per window (the
+    window grows for rates under one call a second); `delay()` claims a call and
+    returns 0, or returns how long to wait before trying again.
+    """
+
+    def __init__(self, client, rate_per_second: float, key: str = "upstream:rate"):
+        self.client = client
+        self.window = max(1, math.ceil(1 / rate_per_second))
+        self.limit = max(1, int(rate_per_second * self.window))
+        self.key = key
+        self.blocking = getattr(client, "blocking", True)
+        self.rejected = 0
+
+    def delay(self) -> float:
+        now = time.time()
+        window = int(now // self.window)
+        key = f"{self.key}:{window}"
+        count = self.client.incr(key)
+        if count == 1:
+            # Old windows clean themselves up
+            self.client.expire(key, self.window * 2)
+        if count <= self.limit:
+            return 0.0
+        self.rejected += 1
+        return (window + 1) * self.window - now
@@ -0,0 +1,89 @@
+# streaming.py
+# Turns a streamed agent run into token/progress events for the frontend, as
+# Server-Sent Events or newline-delimited JSON.
+
+import asyncio
+import inspect
+import json
+
+# Progress line shown while a tool or sub-agent is working
+PROGRESS_MESSAGES = {
+    "SaleAgent": "Searching properties for sale…",
+    "RentAgent": "Searching rentals…",
+    "WebsiteAgent": "Looking up website information…",
+    "ContactAgent": "Fetching contact details…",
+    "sale_properties": "Searching properties for sale…",
+    "rent_properties": "Searching rentals…",
+    "web_about": "Looking up website information…",
+    "contact_info": "Fetching contact details…",
+}
+
+MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+ERROR_EVENT = {"type": "error", "error": "An unexpected error occurred. Please try again later."}
+
+
+def encode_event(event: dict, format: str = "sse") -> str:
+    if format == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+async def events_until(task: asyncio.Future, queue: asyncio.Queue):
+    """Yield events put on `queue` until `task` finishes, then whatever is left.
+
+    Lets a stream report progress from work that happens before the run starts
+    (e.g. fan-out branches); the caller reads the task's result afterwards.
+    """
+    while not task.done():
+        getter = asyncio.ensure_future(queue.get())
+        try:
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            yield getter.result()
+    while not queue.empty():
+        yield queue.get_nowait()
+
+
+async def stream_run(result, request=None, on_complete=None):
+    """Yield event dicts from a `Runner.run_streamed` result.
+
+    Events are `token` (text delta), `progress` (tool or sub-agent started), `done`
+    (final output) and `error`; `on_complete(result)` may be sync or async. If the client goes away the in-flight run is
+    cancelled so we stop paying for the generation.
+    """
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    try:
+        async for event in result.stream_events():
+            if request is not None and await request.is_disconnected():
+                break
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                yield {"type": "token", "delta": event.data.delta}
+            elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                tool_name = getattr(event.item.raw_item, "name", "")
+                yield {
+                    "type": "progress",
+                    "agent": event.item.agent.name,
+                    "tool": tool_name,
+                    "message": PROGRESS_MESSAGES.get(tool_name, "Working on it…"),
+                }
+            elif event.type == "agent_updated_stream_event":
+                yield {"type": "progress", "agent": event.new_agent.name, "tool": None, "message": "Thinking…"}
+        else:
+            if on_complete is not None:
+                completed = on_complete(result)
+                if inspect.isawaitable(completed):
+                    await completed
+            yield {"type": "done", "response": result.final_output}
+    except Exception:
+        yield dict(ERROR_EVENT)
+    finally:
+        if not result.is_complete:
+            result.cancel()
@@ -0,0 +1,247 @@
+# upstream.py
+# HTTP client for the Gemini (OpenAI-compatible) API: a tuned keep-alive pool,
+# retries with jittered backoff on 429/5xx, and a global limiter that caps
+# in-flight upstream calls and queues the rest in arrival order.
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import httpx
+
+from serving.instrumentation import record_span
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class UpstreamSettings:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    pool_timeout: float = 30.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    max_in_flight: int = 8
+    rate_per_second: float = 0.0  # 0 disables the token bucket
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "UpstreamSettings":
+        """Read UPSTREAM_* environment variables, e.g. UPSTREAM_MAX_IN_FLIGHT=16."""
+        settings = cls()
+        for name, default in vars(cls()).items():
+            raw = os.getenv(f"UPSTREAM_{name.upper()}")
+            if raw is None:
+                continue
+            if isinstance(default, bool):
+                setattr(settings, name, raw.lower() in ("1", "true", "yes"))
+            else:
+                setattr(settings, name, type(default)(raw))
+        return settings
+
+
+class UpstreamLimiter:
+    """Caps concurrent upstream calls (semaphore) and optionally their rate (token bucket).
+
+    Waiters are served first come, first served. Queue depth and wait times are
+    kept for the stats endpoint. With several worker processes, `shared_rate`
+    (a serving.shared.SharedRateLimit) replaces the per-process token bucket so
+    the rate holds across all of them.
+    """
+
+    def __init__(self, max_in_flight: int = 8, rate_per_second: float = 0.0, burst: int | None = None, shared_rate=None):
+        self.max_in_flight = max_in_flight
+        self.rate_per_second = rate_per_second
+        self.shared_rate = shared_rate
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._bucket_lock = asyncio.Lock()
+        self._capacity = float(burst or max_in_flight)
+        self._tokens = self._capacity
+        self._refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=1024)
+        self.retries = 0
+        self.responses_by_status: dict[int, int] = {}
+
+    async def _take_token(self):
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._refilled_at) * self.rate_per_second)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+    async def _take_shared_token(self):
+        async with self._bucket_lock:
+            while True:
+                if self.shared_rate.blocking:
+                    delay = await asyncio.to_thread(self.shared_rate.delay)
+                else:
+                    delay = self.shared_rate.delay()
+                if delay <= 0:
+                    return
+                await asyncio.sleep(delay)
+
+    async def acquire(self):
+        started = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+            if self.shared_rate is not None or self.rate_per_second > 0:
+                try:
+                    await (self._take_shared_token() if self.shared_rate is not None else self._take_token())
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.in_flight += 1
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self._recent_waits.append(waited)
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def snapshot(self) -> dict:
+        waits = sorted(self._recent_waits)
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "acquired": self.acquired,
+            "avg_wait_seconds": self.total_wait / self.acquired if self.acquired else 0.0,
+            "p95_wait_seconds": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "retries": self.retries,
+            "shared_rate_waits": self.shared_rate.rejected if self.shared_rate is not None else 0,
+            "responses_by_status": dict(self.responses_by_status),
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Holds the limiter slot until a (possibly streamed) response body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class UpstreamTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport with the limiter and retry/backoff policy."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: UpstreamLimiter, settings: UpstreamSettings):
+        self._transport = transport
+        self._limiter = limiter
+        self._settings = settings
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self._settings.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self._settings.backoff_max, self._settings.backoff_base * 2 ** attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self._limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError) as error:
+                self._limiter.release()
+                record_span("http", request.url.path, time.perf_counter() - started, error=True, attempt=attempt, exception=type(error).__name__)
+                if attempt >= self._settings.max_retries:
+                    raise
+                response = None
+            except BaseException:
+                self._limiter.release()
+                raise
+            else:
+                # Time to response headers; streamed bodies are covered by the llm span
+                record_span("http", request.url.path, time.perf_counter() - started, error=response.status_code >= 400, attempt=attempt, status=response.status_code)
+                statuses = self._limiter.responses_by_status
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self._settings.max_retries:
+                    response.stream = _ReleasingStream(response.stream, self._limiter.release)
+                    return response
+                await response.aclose()
+                self._limiter.release()
+            # Back off outside the limiter so queued calls can use the slot meanwhile
+            self._limiter.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def build_http_client(settings: UpstreamSettings, limiter: UpstreamLimiter) -> httpx.AsyncClient:
+    """httpx client for AsyncOpenAI(http_client=...); pass max_retries=0 there since retries happen here."""
+    http2 = settings.http2 and HTTP2_AVAILABLE
+    pool = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=UpstreamTransport(pool, limiter, settings),
+        timeout=httpx.Timeout(
+            connect=settings.connect_timeout,
+            read=settings.read_timeout,
+            write=settings.read_timeout,
+            pool=settings.pool_timeout,
+        ),
+    )
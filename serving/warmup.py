@@ -0,0 +1,102 @@
+# warmup.py
+# Cold-start support: expensive objects (the agent graph and the openai/agents
+# stack behind it) are built once on first use, optionally ahead of traffic by a
+# startup warm-up that also pre-opens upstream connections. /ready reports on it.
+
+import asyncio
+import threading
+import time
+
+_UNSET = object()
+
+
+class Lazy:
+    """Builds a value on first use, exactly once, even when asked from several threads."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+        self.build_seconds: float | None = None
+
+    @property
+    def built(self) -> bool:
+        return self._value is not _UNSET
+
+    def get(self):
+        if self._value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    started = time.perf_counter()
+                    self._value = self._factory()
+                    self.build_seconds = time.perf_counter() - started
+        return self._value
+
+    async def aget(self):
+        """`get()` that builds (imports included) in a worker thread instead of blocking the event loop."""
+        if self._value is not _UNSET:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+
+class Warmup:
+    """Runs named startup steps in order and keeps their state for the readiness probe."""
+
+    def __init__(self, mode: str = "background"):
+        self.mode = mode  # "background", "blocking" or "off"
+        self.state = "cold"  # cold -> warming -> ready | failed
+        self.error: str | None = None
+        self.steps: dict[str, float] = {}
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        # With warm-up off the service takes traffic straight away and builds on first use
+        return self.state == "ready" or (self.mode == "off" and self.state != "failed")
+
+    async def run(self, steps):
+        """`steps` is a list of (name, async callable); a failing step marks the warm-up failed."""
+        self.state = "warming"
+        self.started_at = time.perf_counter()
+        try:
+            for name, step in steps:
+                started = time.perf_counter()
+                await step()
+                self.steps[name] = round(time.perf_counter() - started, 4)
+        except Exception as error:
+            self.state = "failed"
+            self.error = f"{type(error).__name__}: {error}"
+        else:
+            self.state = "ready"
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "state": self.state,
+            "error": self.error,
+            "steps": dict(self.steps),
+            "seconds": round(self.finished_at - self.started_at, 4) if self.finished_at and self.started_at else None,
+        }
+
+
+async def preopen_connections(openai_client, connections: int = 2, timeout: float = 5.0) -> int:
+    """Open keep-alive connections to the upstream API ahead of the first request.
+
+    Issues cheap concurrent GET /models calls; any HTTP answer (even 401/404)
+    leaves a warm connection in the pool. Returns how many got an answer.
+    """
+    async def touch():
+        try:
+            await asyncio.wait_for(openai_client.models.list(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except Exception as error:
+            # An API error still means the TLS connection is up; a connect error does not
+            return getattr(error, "status_code", None) is not None
+
+    return sum(await asyncio.gather(*(touch() for _ in range(connections))))
@@ -0,0 +1,115 @@
+# workers.py
+# Multi-process serving. The master imports the app once, so the catalog, its
+# indexes and the website sections are built a single time, freezes the garbage
+# collector so those objects' pages are not rewritten (and copied) by a
+# collection in the workers, binds the listening socket and forks N uvicorn
+# workers that accept on it. Workers share the catalog copy-on-write and the
+# LISTING_INDEX_DIR index through the page cache (it is memory-mapped); cached
+# answers, sessions and the upstream rate are shared through SHARED_STATE_URL.
+# A worker that dies is replaced; SIGINT/SIGTERM stops them all.
+#
+#   python -m serving.workers --workers 4 --port 8000
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import signal
+import time
+
+import uvicorn
+
+from serving.instrumentation import logger
+
+RESTART_BACKOFF = 1.0
+
+
+def _log(event: str, **fields):
+    logger.warning(json.dumps({"event": event, **fields}))
+
+
+def _serve(app, sock, log_level: str):
+    """Worker body: runs in the forked child and never returns."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    code = 0
+    try:
+        uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+    except BaseException:
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(target: str = "main:app", host: str = "127.0.0.1", port: int = 8000, workers: int | None = None,
+          log_level: str = "warning"):
+    workers = workers or os.cpu_count() or 1
+    # Read by the app at import time to split per-process limits between the workers
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    module_name, _, attr = target.partition(":")
+    module = importlib.import_module(module_name)
+    app = getattr(module, attr or "app")
+    preload = getattr(module, "preload", None)
+    if preload is not None:
+        preload()
+    if workers > 1 and os.getenv("SHARED_STATE_URL", "memory:").startswith("memory:"):
+        _log("workers_without_shared_state", detail="cached answers and sessions stay per worker; set SHARED_STATE_URL (or SESSION_DB)")
+
+    sock = uvicorn.Config(app, host=host, port=port).bind_socket()
+    gc.collect()
+    gc.freeze()
+
+    children: dict[int, int] = {}  # pid -> worker number
+    stopping = False
+
+    def spawn(number: int):
+        pid = os.fork()
+        if pid == 0:
+            _serve(app, sock, log_level)
+        children[pid] = number
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for number in range(workers):
+        spawn(number)
+    _log("workers_started", pid=os.getpid(), workers=workers, host=host, port=port, children=sorted(children))
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        number = children.pop(pid, None)
+        if number is None or stopping:
+            continue
+        _log("worker_exited", pid=pid, worker=number, status=os.waitstatus_to_exitcode(status))
+        time.sleep(RESTART_BACKOFF)
+        if not stopping:
+            spawn(number)
+    sock.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Serve the chatbot from several pre-forked worker processes")
+    parser.add_argument("--app", default="main:app", help="module:attribute of the ASGI app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or None,
+                        help="worker processes (default: WEB_CONCURRENCY, else one per core)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+    serve(args.app, args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    main_cli()